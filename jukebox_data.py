@@ -6,17 +6,27 @@
 import sys
 import os
 import json
-import re
 import shutil
+import threading
+import mmap
+import time
+import logging
+import importlib.util
+import functools
 from pathlib import Path
 from PyQt5.QtWidgets import QApplication, QMessageBox
 
+# Logging: INFO per i cambi di stato, DEBUG per i dettagli (formattazione lazy)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+log = logging.getLogger("jukebox")
+
 # Try importing necessary libraries. Provide user feedback if missing.
+# yt_dlp is only checked for here: the import itself (hundreds of ms) is deferred to the first search
 try:
-    import yt_dlp
+    if importlib.util.find_spec("yt_dlp") is None:
+        raise ImportError("yt_dlp")
 except ImportError:
-    print("FATAL ERROR: La libreria 'yt_dlp' non è installata.")
-    print("Per installarla, esegui: pip install yt-dlp")
+    log.critical("La libreria 'yt_dlp' non è installata. Per installarla, esegui: pip install yt-dlp")
     app = QApplication.instance()
     if app is None: app = QApplication(sys.argv)
     QMessageBox.critical(None, "Errore Critico", "La libreria 'yt_dlp' non è installata.\nPer installarla, esegui: pip install yt-dlp")
@@ -25,18 +35,16 @@ except ImportError:
 try:
     import vlc
 except ImportError:
-    print("FATAL ERROR: Le librerie 'python-vlc' non sono installate.")
-    print("Per installarle, esegui: pip install python-vlc")
+    log.critical("Le librerie 'python-vlc' non sono installate. Per installarle, esegui: pip install python-vlc")
     app = QApplication.instance()
     if app is None: app = QApplication(sys.argv)
     QMessageBox.critical(None, "Errore Critico", "Le librerie 'python-vlc' non sono installate.\nPer installarle, esegui: pip install python-vlc")
     sys.exit(1)
 
 try:
-    from PIL import Image, ImageDraw
+    import orjson # Serializzazione JSON veloce (opzionale, fallback su json)
 except ImportError:
-     print("Warning: Pillow (PIL) not installed. Cannot create default cover placeholder.")
-     Image = ImageDraw = None
+    orjson = None
 
 # Assicura che l'istanza VLC sia creata all'inizio
 vlc_instance = None
@@ -52,7 +60,7 @@ try:
     if vlc_instance is None:
          raise RuntimeError("Impossibile creare istanza VLC.")
 except Exception as e:
-    print(f"FATAL ERROR: Impossibile inizializzare VLC. Assicurati che libvlc sia installato e accessibile. Dettagli: {e}")
+    log.critical("Impossibile inizializzare VLC. Assicurati che libvlc sia installato e accessibile. Dettagli: %s", e)
     # Ensure QApplication exists before showing QMessageBox
     app_instance = QApplication.instance()
     if app_instance is None: app_instance = QApplication(sys.argv)
@@ -63,43 +71,86 @@ except Exception as e:
 # -------------------- Configuration & Constants --------------------
 # Use the directory of *this* data file as the base
 DATA_DIR = Path(__file__).resolve().parent / "data"
-DATA_DIR.mkdir(parents=True, exist_ok=True)
-
 COVER_DIR = DATA_DIR / "covers"
-COVER_DIR.mkdir(parents=True, exist_ok=True)
-
 DOWNLOAD_DIR = DATA_DIR / "downloads"
-DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+# Create the data directories only if missing (one stat each on normal starts)
+for _dir in (DATA_DIR, COVER_DIR, DOWNLOAD_DIR):
+    if not _dir.is_dir():
+        _dir.mkdir(parents=True, exist_ok=True)
 
 DEFAULT_COVER = DATA_DIR / "default_cover.png"
-if not DEFAULT_COVER.exists() and Image is not None and ImageDraw is not None:
+if not DEFAULT_COVER.exists():
+    # Pillow is only needed here, so it is imported only when the placeholder is missing
     try:
+        from PIL import Image, ImageDraw
         img = Image.new('RGB', (100, 100), color = (50, 50, 50))
         d = ImageDraw.Draw(img)
         d.text((10,10), "No Cover", fill=(200,200,200))
         img.save(DEFAULT_COVER)
-        print("Default cover placeholder created.")
+        log.info("Default cover placeholder created.")
+    except ImportError:
+        log.warning("Pillow (PIL) not installed. Cannot create default cover placeholder.")
     except Exception as e:
-        print(f"Warning: Error creating default cover: {e}")
+        log.warning("Error creating default cover: %s", e)
 
-AUDIO_EXTS = {".mp3", ".flac", ".wav", ".ogg", ".m4a", ".webm", ".opus"}
+AUDIO_EXTS = frozenset({".mp3", ".flac", ".wav", ".ogg", ".m4a", ".webm", ".opus"})
 MAX_HISTORY_SIZE = 50
 
-YOUTUBE_REGEX = re.compile(
-    r'(?:https?:\/\/)?(?:www\.)?(?:youtube\.com|youtu\.be)\/(?:watch\?v=)?(?:embed\/)?(?:v\/)?'
-    r'([\w-]{11})'
-)
-
-# Check for FFmpeg (required for MP3 conversion)
-FFMPEG_PATH = shutil.which('ffmpeg')
-if FFMPEG_PATH:
-    print(f"FFmpeg found at: {FFMPEG_PATH}")
-else:
-    print("Warning: FFmpeg not found in PATH. MP3 download conversion will not be available.")
+# URL fragments that are directly followed by an 11-character YouTube video ID
+_YT_HOSTS = ('youtu.be/', 'youtube.com/watch?v=', 'youtube.com/embed/', 'youtube.com/v/')
+_YT_ID_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-')
+
+@functools.lru_cache(maxsize=4096)
+def extract_yt_id(url):
+    """Returns the YouTube video ID contained in url, or None (cached per URL)."""
+    if not url or 'youtu' not in url: # Cheap substring gate before scanning
+        return None
+    # Plain substring scan instead of a regex: find a known host/path prefix and take the next 11 chars
+    for host in _YT_HOSTS:
+        i = url.find(host)
+        if i >= 0:
+            start = i + len(host)
+            video_id = url[start:start + 11]
+            if len(video_id) == 11 and _YT_ID_CHARS.issuperset(video_id):
+                return video_id
+    return None
+
+@functools.lru_cache(maxsize=4096)
+def is_youtube_url(url):
+    """True if url points to YouTube (the sites the MP3 download is offered for); cached per URL."""
+    return bool(url) and ('youtube.com' in url or 'youtu.be' in url)
+
+@functools.lru_cache(maxsize=None)
+def ffmpeg_path():
+    """Returns the FFmpeg executable path (required for MP3 conversion) or None.
+
+    The PATH lookup is done on first use and cached for the rest of the process.
+    """
+    path = shutil.which('ffmpeg')
+    if path:
+        log.info("FFmpeg found at: %s", path)
+    else:
+        log.warning("FFmpeg not found in PATH. MP3 download conversion will not be available.")
+    return path
 
 # -------------------- Data Structures --------------------
+@functools.lru_cache(maxsize=2048)
+def _classify_local(path_str):
+    """Returns the resolved path if path_str is an existing audio file, else None (cached per string)."""
+    # Cheap extension check first: most stream URLs never touch the filesystem
+    dot = path_str.rfind('.')
+    if dot < 0 or path_str[dot:].lower() not in AUDIO_EXTS: # No extension parsing/Path object needed
+        return None
+    if not os.path.exists(path_str):
+        return None
+    return os.path.realpath(path_str)
+
 class Track:
     """Represents a single track (local or stream)."""
+    # No per-instance __dict__: playlists/history/favorites hold many Track objects
+    __slots__ = ('url', 'title', 'thumbnail_url', 'duration_sec', 'is_local', 'webpage_url', 'identifier')
+
     def __init__(self, url, title, thumbnail_url=None, duration_sec=0, is_local=False, webpage_url=None):
         self.url = url
         self.title = title
@@ -112,6 +163,10 @@ class Track:
         if self.is_local and (self.webpage_url is None or not self.webpage_url):
              self.webpage_url = self.url # For local files, webpage_url can be the file path itself
 
+        # Unique key used by history/favorites (webpage_url, falling back to url).
+        # Computed once: history and favorites hold copies that are never modified afterwards.
+        self.identifier = self.webpage_url or self.url
+
     def to_dict(self):
         """Converts Track object to a dictionary for JSON serialization."""
         return {
@@ -126,15 +181,15 @@ class Track:
     @staticmethod
     def from_dict(data):
         """Creates a Track object from a dictionary (handles migration from old formats)."""
-        if not isinstance(data, (dict, str, list)):
-             print(f"Errore conversione Track: dato non è un dict, str o list: {type(data)}")
-             return Track(None, "Invalid Track Data") # Return a dummy track
-
-        migrated_data = {}
         identifier_url = None # Used for title fallback and history identification
 
         # --- Migration Logic ---
-        if isinstance(data, str): # Old format: just URL/path
+        if isinstance(data, dict): # Current or slightly older dict format (almost every saved item: checked first)
+             migrated_data = data
+             # Prioritize webpage_url as the identifier, fall back to url
+             identifier_url = migrated_data.get("webpage_url", migrated_data.get("url"))
+
+        elif isinstance(data, str): # Old format: just URL/path
             identifier_url = data
             migrated_data = {"title": data, "webpage_url": data, "url": data} # Assume URL is webpage and stream URL
 
@@ -155,14 +210,12 @@ class Track:
                  "webpage_url": webpage_url_old, # This is the identifier URL
              }
 
-        elif isinstance(data, dict): # Current or slightly older dict format
-             migrated_data = data
-             # Prioritize webpage_url as the identifier, fall back to url
-             identifier_url = migrated_data.get("webpage_url", migrated_data.get("url"))
+        elif isinstance(data, list):
+             log.warning("Elemento inaspettato durante la migrazione: %r. Ignorato.", data)
+             return Track(None, "Invalid Track Data") # Return a dummy track
 
         else:
-             # Should not happen with the initial check, but safety first
-             print(f"Elemento inaspettato durante la migrazione: {data}. Ignorato.")
+             log.warning("Errore conversione Track: dato non è un dict, str o list: %s", type(data))
              return Track(None, "Invalid Track Data") # Return a dummy track
         # --- End Migration Logic ---
 
@@ -195,16 +248,16 @@ class Track:
              potential_path_str = track.url # Usually the URL field holds the path for local files
              if potential_path_str:
                  try:
-                     potential_path = Path(str(potential_path_str))
                      # Check suffix and if the file *actually* exists
-                     if potential_path.suffix.lower() in AUDIO_EXTS and potential_path.exists():
+                     resolved_path = _classify_local(str(potential_path_str))
+                     if resolved_path:
                          track.is_local = True
                          # If it's local, ensure URL is the resolved absolute path
-                         track.url = str(potential_path.resolve())
+                         track.url = resolved_path
                  except OSError: # Handle potential errors with invalid path characters
                      pass
                  except Exception as e: # Catch other potential Path errors
-                     print(f"Warning: Error checking path '{potential_path_str}' for local status: {e}")
+                     log.debug("Error checking path '%s' for local status: %s", potential_path_str, e)
 
 
         # Ensure webpage_url is set consistently
@@ -215,40 +268,156 @@ class Track:
              # (This might not always be the YouTube page, but it's better than nothing)
              track.webpage_url = track.url
 
+        # The same track is usually saved in playlist, history and favorites: intern the URLs so
+        # the three loaded copies share one string each (also makes identifier comparisons cheaper)
+        if type(track.url) is str: track.url = sys.intern(track.url)
+        if type(track.webpage_url) is str: track.webpage_url = sys.intern(track.webpage_url)
+        if type(track.thumbnail_url) is str: track.thumbnail_url = sys.intern(track.thumbnail_url)
+
+        track.identifier = track.webpage_url or track.url # url/webpage_url may have changed above
         return track
 
 # -------------------- JSON Helpers --------------------
-def save_json(name: str, data_list):
-    """Saves a list of Track objects (or other serializable data) to a JSON file."""
-    # Convert Track objects to dictionaries before saving
-    data_to_save = [item.to_dict() if isinstance(item, Track) else item for item in data_list]
+if orjson is not None:
+    JSONDecodeError = orjson.JSONDecodeError
+
+    def json_dumps(data):
+        """Serializes data to UTF-8 encoded JSON bytes."""
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+    def json_loads(raw):
+        """Parses JSON from bytes or str."""
+        return orjson.loads(raw)
+else:
+    JSONDecodeError = json.JSONDecodeError
+
+    def json_dumps(data):
+        """Serializes data to UTF-8 encoded JSON bytes."""
+        return json.dumps(data, indent=2).encode("utf-8")
+
+    def json_loads(raw):
+        """Parses JSON from bytes or str."""
+        return json.loads(raw)
+
+
+# Last bytes written to (or read from) each JSON file, keyed by file name.
+# Lets the writer skip rewriting files whose content did not change.
+_json_bytes_cache = {}
+
+# Background persistence: save_json only queues a snapshot, a single daemon
+# thread does the encoding and disk I/O. Only the latest snapshot per file is kept.
+_pending_saves = {}                  # name -> list of dicts waiting to be written
+_pending_lock = threading.Lock()     # Guards _pending_saves and _writer_thread
+_write_lock = threading.Lock()       # Serializes the actual file writes (writer thread vs flush_json)
+_pending_event = threading.Event()   # Set when _pending_saves has something to write
+_writer_thread = None
+JSON_MMAP_THRESHOLD = 1 << 20        # load_json memory-maps files larger than this (orjson only)
+JSON_SAVE_DEBOUNCE_SEC = 1.0          # Rapid successive saves within this window become one write
+
+# Directories already known to exist, so saves don't re-stat/mkdir them every time
+_ready_dirs = {DATA_DIR} # Created at import
+
+def _ensure_dir(path: Path):
+    """Creates path (and parents) the first time it is seen in this process."""
+    if path not in _ready_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _ready_dirs.add(path)
+
+
+def _save_json_sync(name: str, data_to_save):
+    """Encodes and atomically writes already-converted data to a JSON file."""
     fp = DATA_DIR / name
     try:
-        fp.parent.mkdir(parents=True, exist_ok=True) # Ensure directory exists
-        fp.write_text(json.dumps(data_to_save, indent=2), encoding="utf-8")
+        encoded = json_dumps(data_to_save)
+        if _json_bytes_cache.get(name) == encoded:
+            return # Nothing changed since the last save, skip the disk write
+        _ensure_dir(fp.parent) # Ensure directory exists (checked once per process)
+        # Write the whole buffer to a temp file, then atomically swap it in,
+        # so a crash mid-write never leaves a truncated/corrupted JSON file.
+        tmp_fp = fp.with_name(fp.name + ".tmp")
+        with open(tmp_fp, 'wb') as f:
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_fp, fp)
+        _json_bytes_cache[name] = encoded
     except Exception as e:
-        print(f"Errore salvataggio JSON {name}: {e}")
+        log.error("Errore salvataggio JSON %s: %s", name, e)
+
+
+def _write_pending_saves():
+    """Writes every queued snapshot. Must be called with _write_lock held."""
+    with _pending_lock:
+        pending = dict(_pending_saves)
+        _pending_saves.clear()
+        _pending_event.clear()
+    for name, data_to_save in pending.items():
+        _save_json_sync(name, data_to_save)
+
+
+def _json_writer_loop():
+    """Body of the background writer thread."""
+    while True:
+        _pending_event.wait()
+        # Debounce: saves queued during this window are coalesced into a single write per file
+        time.sleep(JSON_SAVE_DEBOUNCE_SEC)
+        with _write_lock:
+            _write_pending_saves()
+
+
+def save_json(name: str, data_list):
+    """Queues a list of Track objects (or other serializable data) to be saved to a JSON file.
+
+    The snapshot is taken immediately, the file is written by a background thread.
+    Call flush_json() before exiting to make sure everything reached the disk.
+    """
+    global _writer_thread
+    # Convert Track objects to dictionaries now, so later changes to the list don't leak in
+    data_to_save = [item.to_dict() if isinstance(item, Track) else item for item in data_list]
+    with _pending_lock:
+        _pending_saves[name] = data_to_save # Newer snapshots replace older unsaved ones
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=_json_writer_loop, name="JsonWriter", daemon=True)
+            _writer_thread.start()
+    _pending_event.set()
+
+
+def flush_json():
+    """Synchronously writes any queued save_json snapshots (call before the application exits)."""
+    with _write_lock:
+        _write_pending_saves()
 
 
 def load_json(name: str, item_class=None):
     """Loads data from a JSON file, optionally converting items to item_class objects using from_dict."""
     fp = DATA_DIR / name
-    if not fp.exists():
-        return [] # Return empty list if file doesn't exist
     try:
-        content = fp.read_text(encoding="utf-8").strip()
-        if not content: # Handle empty file
+        try:
+            size = fp.stat().st_size
+        except FileNotFoundError:
+            return [] # Return empty list if file doesn't exist
+        if size == 0: # Handle empty file
              return []
 
-        raw_data = json.loads(content)
+        if orjson is not None and size > JSON_MMAP_THRESHOLD:
+            # Large file: orjson parses straight from the mapped pages, no copy of the file in memory
+            with open(fp, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    raw_data = orjson.loads(view)
+        else:
+            content = fp.read_bytes() # Single read, parsed directly as bytes
+            if content.isspace(): # Handle whitespace-only file
+                 return []
+            raw_data = json_loads(content)
+            _json_bytes_cache[name] = content # Unchanged data won't be rewritten by save_json
 
         if not isinstance(raw_data, list):
-             print(f"Errore: Il file {name} non contiene una lista valida JSON: {type(raw_data)}")
+             log.error("Il file %s non contiene una lista valida JSON: %s", name, type(raw_data))
              # Attempt recovery if it's a dict containing a list (rare case)
              if isinstance(raw_data, dict) and len(raw_data) == 1:
                  key = list(raw_data.keys())[0]
                  if isinstance(raw_data[key], list):
-                     print(f"Avviso: Recupero lista dalla chiave '{key}' nel file {name}.")
+                     log.warning("Recupero lista dalla chiave '%s' nel file %s.", key, name)
                      raw_data = raw_data[key]
                  else:
                      return [] # Cannot recover list
@@ -258,32 +427,34 @@ def load_json(name: str, item_class=None):
         # Process items if an item_class with from_dict is provided
         if item_class and hasattr(item_class, 'from_dict'):
             processed_data = []
+            from_dict = item_class.from_dict # Hoisted out of the per-item loop
+            append = processed_data.append
             for item_data in raw_data:
                  try:
-                    item = item_class.from_dict(item_data)
+                    item = from_dict(item_data)
                     # Add only if the created item is valid (e.g., has a title or URL)
                     if item and (item.title or item.url):
-                         processed_data.append(item)
+                         append(item)
                     else:
-                        print(f"Avviso: Elemento non valido saltato durante il caricamento di {name}: {item_data}")
+                        log.debug("Elemento non valido saltato durante il caricamento di %s: %r", name, item_data)
                  except Exception as e:
-                     print(f"Errore durante la conversione dell'elemento in {name}: {item_data} -> {e}")
+                     log.warning("Errore durante la conversione dell'elemento in %s: %r -> %s", name, item_data, e)
 
             return processed_data
         else:
              # Return raw list if no conversion class provided
              return raw_data
 
-    except json.JSONDecodeError as e:
-        print(f"Errore di decodifica JSON nel file {name}: {e}")
+    except JSONDecodeError as e:
+        log.error("Errore di decodifica JSON nel file %s: %s", name, e)
         # Optionally, try to backup the corrupted file here
         # backup_path = fp.with_suffix(f".corrupted_{int(time.time())}.json")
         # try: shutil.copy(fp, backup_path); print(f"Backed up corrupted file to {backup_path}")
         # except Exception as backup_e: print(f"Error backing up corrupted file: {backup_e}")
         return [] # Return empty list on decoding error
     except Exception as e:
-        print(f"Errore generico durante il caricamento del file {name}: {e}")
+        log.error("Errore generico durante il caricamento del file %s: %s", name, e)
         return [] # Return empty list on other errors
 
-print(f"Data directory: {DATA_DIR}")
-print("jukebox_data.py loaded.")
\ No newline at end of file
+log.info("Data directory: %s", DATA_DIR)
+log.debug("jukebox_data.py loaded.")
\ No newline at end of file
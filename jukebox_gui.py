@@ -3,137 +3,406 @@
 # Contiene la classe principale dell'interfaccia grafica (Jukebox),
 # la tastiera virtuale (VirtualKeyboard), e il codice di avvio.
 
-import sys
 import os
-import json
-import threading
-import requests
+import sys
 import time
 import hashlib
+import functools
+import logging
+import collections
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QLineEdit, QListWidget, QListWidgetItem, QSlider, QMessageBox,
-    QInputDialog, QShortcut, QGridLayout, QFileDialog, QSpinBox,
-    QSizePolicy, QProgressDialog, QDesktopWidget, QCheckBox,QMenu, QAction
+    QLineEdit, QListView, QSlider, QMessageBox,
+    QInputDialog, QShortcut, QFileDialog, QSpinBox,
+    QCheckBox, QMenu, QAction
 )
-from PyQt5.QtGui import QPixmap, QFont, QColor, QMovie, QKeySequence
+from PyQt5.QtGui import QPixmap, QPixmapCache, QColor, QMovie, QKeySequence, QPainter, QPen, QFont
 from PyQt5.QtCore import (
-    Qt, QTimer, pyqtSignal, QEvent, QPoint, QThread, QMutex, QUrl,
-    QSize, QRect, QPropertyAnimation
+    Qt, QTimer, pyqtSignal, QEvent, QPoint, QSize, QRect, QThreadPool,
+    QAbstractListModel, QModelIndex, QItemSelectionModel
 )
 import vlc # Import vlc module itself
 
 # Importa elementi necessari dagli altri moduli
 from jukebox_data import (
-    vlc_instance, Track, save_json, load_json,
+    vlc_instance, Track, save_json, load_json, flush_json,
     DATA_DIR, COVER_DIR, DOWNLOAD_DIR, DEFAULT_COVER,
-    AUDIO_EXTS, MAX_HISTORY_SIZE, YOUTUBE_REGEX, FFMPEG_PATH
+    AUDIO_EXTS, MAX_HISTORY_SIZE, ffmpeg_path, extract_yt_id, is_youtube_url, json_loads
 )
 from jukebox_workers import (
-    YoutubeSearchWorker, CoverDownloadWorker, FileProbeWorker
+    YoutubeSearchWorker, CoverDownloadWorker, CoverDecodeTask, FileProbeTask
 )
 
+log = logging.getLogger("jukebox.gui") # Configured by jukebox_data (basicConfig)
+
+# VLC states looked up by the periodic progress update (resolved once at import)
+_STATE_PLAYING = vlc.State.Playing
+_PROGRESS_STATES = (vlc.State.Playing, vlc.State.Paused, vlc.State.Buffering)
+
+@functools.lru_cache(maxsize=4096)
+def _fmt_seconds(seconds):
+    """Formats whole seconds as HH:MM:SS or MM:SS (cached: the same values come back on every tick)."""
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    if h > 0:
+        return f"{h:d}:{m:02d}:{s:02d}" # HH:MM:SS
+    return f"{m:02d}:{s:02d}"           # MM:SS
+
+# VLC player events forwarded to _on_media_event (attached in __init__, detached in closeEvent)
+_PLAYER_EVENTS = (vlc.EventType.MediaPlayerEndReached, vlc.EventType.MediaPlayerEncounteredError,
+                  vlc.EventType.MediaPlayerPlaying, vlc.EventType.MediaPlayerPaused,
+                  vlc.EventType.MediaPlayerStopped)
+
+# VLC events after which the progress timer is stopped (nothing moves until the next MediaPlayerPlaying)
+_TIMER_STOP_EVENTS = (vlc.EventType.MediaPlayerPaused, vlc.EventType.MediaPlayerStopped,
+                      vlc.EventType.MediaPlayerEndReached, vlc.EventType.MediaPlayerEncounteredError)
+
+# Streaming protocols accepted for non-local tracks (compared against the first 4 chars only)
+_NET_PREFIXES = frozenset(('http', 'rtsp', 'rtmp'))
+
+PIXMAP_CACHE_LIMIT_KB = 40960 # QPixmapCache size (covers are kept decoded between track changes)
+COVER_CACHE_MAX = 128 # Covers kept already scaled to cover_lbl, by thumbnail URL (LRU)
+
+def _cached_pixmap(path_str):
+    """Loads an image file as a QPixmap through QPixmapCache, so it is decoded only once while cached."""
+    pix = QPixmapCache.find(path_str)
+    if pix is None:
+        pix = QPixmap(path_str)
+        if not pix.isNull():
+            QPixmapCache.insert(path_str, pix)
+    return pix
+
+# Stylesheets: installed once on the QApplication (see __main__), so Qt parses them a single time
+_MAIN_QSS = """
+QWidget {
+    background-color: #1e1e1e; /* Dark background */
+    color: #e0e0e0; /* Light grey text */
+    font-family: Arial, sans-serif; /* Consistent font */
+    font-size: 14px; /* Base font size */
+}
+QPushButton {
+    background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #4a4a4a, stop:1 #333);
+    border: 1px solid #555;
+    border-radius: 6px; /* Slightly less rounded */
+    padding: 8px 16px; /* Comfortable padding */
+    font-size: 15px; /* Button text size */
+    color: white;
+    min-height: 30px; /* Ensure minimum height */
+}
+QPushButton:hover {
+    background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #5a5a5a, stop:1 #444);
+    border: 1px solid #777;
+}
+QPushButton:pressed {
+    background-color: #2a2a2a;
+    border: 1px solid #444;
+}
+QPushButton:disabled {
+    background-color: #444;
+    color: #888;
+    border: 1px solid #555;
+}
+
+QSlider::groove:horizontal {
+    border: 1px solid #444;
+    height: 8px; /* Thinner groove */
+    background: #3a3a3a;
+    margin: 2px 0;
+    border-radius: 4px;
+}
+QSlider::handle:horizontal {
+    background: #00cc66; /* Bright green handle */
+    border: 1px solid #00994d;
+    width: 18px; /* Handle width */
+    margin: -6px 0; /* Vertical centering */
+    border-radius: 9px; /* Circular handle */
+}
+QSlider::handle:horizontal:hover {
+    background: #33ff99;
+    border: 1px solid #00cc66;
+}
+QSlider::handle:horizontal:disabled {
+     background: #666;
+     border: 1px solid #555;
+}
+
+QListView {
+    background-color: #2e2e2e;
+    border: 1px solid #444;
+    border-radius: 8px;
+    padding: 5px;
+    color: #e0e0e0;
+    font-size: 14px;
+    alternate-background-color: #333333; /* Subtle row alternation */
+}
+QListView::item {
+    padding: 6px 4px; /* Item padding */
+    border-bottom: 1px solid #3a3a3a; /* Separator */
+    color: #e0e0e0;
+}
+QListView::item:last { border-bottom: none; } /* No border on last item */
+QListView::item:selected {
+    background-color: #0078d7; /* Selection color */
+    color: white;
+    border-radius: 3px;
+}
+QListView::item:hover {
+    background-color: #3e3e3e; /* Hover color */
+    border-radius: 3px;
+}
+
+QLabel { color: #e0e0e0; } /* Default label color */
+QLabel#cover_lbl {
+    border: 2px solid #444;
+    border-radius: 10px;
+    background-color: #282828; /* Darker background for cover area */
+    min-width: 300px; /* Minimum cover size */
+    min-height: 169px;
+}
+QLabel#title_label { /* Specific style for main title */
+    color: #00e673; /* Bright green title */
+    font-size: 22px;
+    font-weight: bold;
+    padding-bottom: 5px; /* Space below title */
+}
+QLabel#info_lbl { /* Style for track title/duration */
+    font-size: 15px;
+    min-height: 2.5em; /* Ensure space for two lines */
+    padding: 5px;
+    color: #cccccc; /* Slightly dimmer info text */
+}
+QLabel#time_lbl { font-size: 13px; color: #bbbbbb; }
+QLabel#query_lbl { /* Style for status/progress messages */
+    color: #00cc66; /* Green status text */
+    font-size: 14px;
+    min-height: 1.2em;
+    padding: 2px;
+}
+
+QLineEdit {
+    padding: 8px 10px;
+    border: 1px solid #555;
+    border-radius: 5px;
+    background-color: #333;
+    color: white;
+    font-size: 16px; /* Larger search input text */
+}
+QLineEdit:focus { border: 1px solid #0078d7; } /* Highlight on focus */
+
+QSpinBox {
+    padding: 5px 8px;
+    border: 1px solid #555;
+    border-radius: 5px;
+    background: #333;
+    color: white;
+    font-size: 14px;
+    min-width: 50px; /* Min width for spinbox */
+}
+QSpinBox::up-button, QSpinBox::down-button { width: 18px; } /* Size of arrows */
+QSpinBox::up-button:hover, QSpinBox::down-button:hover { background-color: #555; }
+
+/* Specific Button Styles */
+QPushButton#play_pause_btn { font-weight: bold; font-size: 16px; }
+QPushButton#add_fav_btn { background-color: #4CAF50; border-color: #388E3C; }
+QPushButton#add_fav_btn:hover { background-color: #5cd65c; }
+QPushButton#add_fav_btn:pressed { background-color: #388E3C; }
+QPushButton#close_button { /* Style for 'X' close button */
+    background-color: #e81123; /* Red */
+    border: 1px solid #a3000f;
+    border-radius: 15px; /* Circular */
+    font-size: 14px;
+    font-weight: bold;
+    padding: 0; /* Remove padding */
+    color: white;
+    min-width: 30px; min-height: 30px; /* Fixed size */
+    max-width: 30px; max-height: 30px;
+}
+QPushButton#close_button:hover { background-color: #f14c59; border-color: #c00; }
+QPushButton#close_button:pressed { background-color: #a3000f; border-color: #800; }
+
+QCheckBox { color: #e0e0e0; spacing: 8px; /* Space between indicator and text */ }
+QCheckBox::indicator { width: 18px; height: 18px; }
+QCheckBox::indicator:unchecked {
+    background-color: #444; border: 1px solid #666; border-radius: 3px;
+}
+QCheckBox::indicator:checked {
+    background-color: #00cc66; border: 1px solid #00994d; border-radius: 3px;
+}
+/* Simple visual checkmark using font character (or border trick) */
+QCheckBox::indicator:checked::after {
+     /* content: '✔'; */ /* Using a character */
+     /* color: black; */
+     /* position: relative; left: 3px; top: -1px; */
+     /* OR Border trick (adjust positioning) */
+     content: ""; display: block; position: relative;
+     left: 6px; top: 3px; width: 4px; height: 8px;
+     border: solid white; border-width: 0 2px 2px 0;
+     transform: rotate(45deg);
+}
+QCheckBox:disabled { color: #888; }
+QCheckBox::indicator:disabled { background-color: #3a3a3a; border: 1px solid #555; }
+QCheckBox::indicator:checked:disabled { background-color: #558870; border: 1px solid #446655; }
+QCheckBox::indicator:checked:disabled::after { border-color: #aaa; }
+
+QMessageBox { background-color: #2e2e2e; }
+QMessageBox QLabel { color: white; font-size: 14px; }
+QMessageBox QPushButton { font-size: 14px; padding: 6px 12px; min-width: 80px;}
+
+QInputDialog { background-color: #2e2e2e; }
+QInputDialog QLabel { color: white; font-size: 14px; }
+QInputDialog QComboBox { background-color: #333; color: white; border: 1px solid #555; padding: 5px;}
+QInputDialog QLineEdit { /* Inherits base style, fine */ }
+QInputDialog QPushButton { font-size: 14px; padding: 6px 12px; min-width: 80px;}
+
+/* Style for the loading indicator */
+QLabel#loading_lbl { /* Add if needed */ }
+"""
+
 # -------------------- Virtual Keyboard Widget --------------------
 class VirtualKeyboard(QWidget):
-    """A simple on-screen virtual keyboard, adapted for touch."""
+    """A simple on-screen virtual keyboard, adapted for touch.
+
+    The keys are not widgets: they are rectangles painted in a single paintEvent,
+    and presses are mapped back to a key through a precomputed grid cell table.
+    """
     key_pressed = pyqtSignal(str) # Emits character or "←" for backspace
     closed = pyqtSignal()         # Emitted when the keyboard is hidden
 
+    # Define keyboard layout rows
+    ROWS = (
+        "`1234567890-=",
+        "qwertyuiop[]\\",
+        "asdfghjkl;'",
+        "zxcvbnm,./"
+    )
+    GRID_COLS = 15 # Uniform grid: 13 keys + 2-column backspace on the widest row
+    GRID_ROWS = len(ROWS) + 1 # + space/done row
+    MARGIN = 8      # Padding around the keys
+    SPACING = 3     # Gap between keys
+    DONE_KEY = "Done"
+    # (key, row, col, colspan) of every key, computed once at class load
+    KEYS = tuple((char, r, c, 1) for r, row_str in enumerate(ROWS) for c, char in enumerate(row_str)) + (
+        ("←", 0, len(ROWS[0]), 2),          # Backspace (top right)
+        (" ", len(ROWS), 2, 8),             # Space Bar (bottom row, centered)
+        (DONE_KEY, len(ROWS), 10, 3),       # Done/Close (bottom right)
+    )
+    # Grid cell (row * GRID_COLS + col) -> index in KEYS, -1 for empty cells
+    CELL_TO_KEY = [-1] * (GRID_COLS * GRID_ROWS)
+    for _i, (_k, _r, _c, _span) in enumerate(KEYS):
+        for _cc in range(_c, _c + _span):
+            CELL_TO_KEY[_r * GRID_COLS + _cc] = _i
+    del _i, _k, _r, _c, _span, _cc
+
+    # Colors (same palette as the old per-button stylesheet)
+    BG_COLOR = QColor("#3a3a3a")
+    BORDER_COLOR = QColor("#555")
+    KEY_COLOR = QColor("#505050")
+    KEY_PRESSED_COLOR = QColor("#404040")
+    KEY_BORDER_COLOR = QColor("#666")
+    DONE_COLOR = QColor("#0078d7")
+    DONE_PRESSED_COLOR = QColor("#005a9e")
+    TEXT_COLOR = QColor("white")
+
     def __init__(self):
         # Use Popup flag to make it close when clicking outside, Frameless for custom look
         super().__init__(flags=Qt.Window | Qt.FramelessWindowHint | Qt.Tool) # <-- NUOVA RIGA (USA Qt.Tool)
-        self.setStyleSheet("""
-        QWidget {
-            background-color: #3a3a3a; /* Darker background */
-            border: 1px solid #555;
-            border-radius: 8px;
-            padding: 8px; /* Increased padding */
-        }
-        QPushButton {
-            background-color: #505050; /* Slightly lighter buttons */
-            color: white;
-            font-size: 18px; /* Larger font */
-            border-radius: 5px;
-            padding: 12px 8px; /* More padding, especially vertical */
-            min-height: 40px; /* Minimum button height */
-            border: 1px solid #666; /* Subtle border */
-            margin: 2px; /* Spacing between buttons */
-        }
-        QPushButton:hover {
-            background-color: #656565;
-            border: 1px solid #777;
-        }
-        QPushButton:pressed {
-            background-color: #404040;
-            border: 1px solid #555;
-        }
-        QPushButton#done_btn { /* Special style for Done button */
-            background-color: #0078d7; /* Blue */
-            font-weight: bold;
-        }
-        QPushButton#done_btn:hover { background-color: #008ae6; }
-        QPushButton#done_btn:pressed { background-color: #005a9e; }
-
-        QPushButton#backspace_btn { /* Special style for Backspace */
-             font-size: 22px; /* Make symbol larger */
-        }
-        QPushButton#space_btn { /* Give space bar more visual weight */
-            /* padding: 12px 50px; */ /* Wider padding if needed */
-        }
-        """)
-        grid = QGridLayout(self)
-        grid.setSpacing(3) # Reduced spacing within the grid itself
-
-        # Define keyboard layout rows
-        rows = [
-            "`1234567890-=",
-            "qwertyuiop[]\\",
-            "asdfghjkl;'",
-            "zxcvbnm,./"
-        ]
+        self.setAttribute(Qt.WA_OpaquePaintEvent) # paintEvent fills the whole widget
 
-        button_fixed_width = 50 # Fixed width for standard keys
-
-        # Create standard character buttons
-        for r, row_str in enumerate(rows):
-            for c, char in enumerate(row_str):
-                btn = QPushButton(char)
-                btn.setFixedWidth(button_fixed_width)
-                # Use lambda with default argument capture for the character
-                btn.clicked.connect(lambda _, x=char: self._emit_key(x))
-                grid.addWidget(btn, r, c)
-
-        # --- Special Keys ---
-        # Backspace Button (top right)
-        backspace_btn = QPushButton("←")
-        backspace_btn.setObjectName("backspace_btn")
-        backspace_btn.setFixedWidth(int(button_fixed_width * 1.5)) # Make it wider
-        backspace_btn.clicked.connect(lambda: self._emit_key("←"))
-        # Place it after the first row's keys
-        grid.addWidget(backspace_btn, 0, len(rows[0]), 1, 2) # Span 2 columns
-
-        # Space Bar (bottom row, centered)
-        space_btn = QPushButton(" ")
-        space_btn.setObjectName("space_btn")
-        space_btn.setFixedHeight(45) # Match other buttons' height + padding
-        space_btn.clicked.connect(lambda: self._emit_key(" "))
-        # AddWidget(widget, row, col, rowSpan, colSpan)
-        grid.addWidget(space_btn, len(rows), 2, 1, 8) # Span 8 columns, starting from col 2
-
-        # Done/Close Button (bottom right)
-        close_btn = QPushButton("Done")
-        close_btn.setObjectName("done_btn")
-        close_btn.setFixedWidth(int(button_fixed_width * 2)) # Make it wider
-        close_btn.clicked.connect(self.hide_keyboard)
-        # Place it next to the space bar
-        grid.addWidget(close_btn, len(rows), 10, 1, 3) # Span 3 cols
+        self._key_rects = [] # QRect of each entry in KEYS, recomputed on resize
+        self._cell_w = self._cell_h = 1.0
+        self._pressed_idx = -1 # Key currently held down (drawn darker)
+
+        self._key_font = QFont(self.font())
+        self._key_font.setPixelSize(18) # Larger font
+        self._backspace_font = QFont(self._key_font)
+        self._backspace_font.setPixelSize(22) # Make symbol larger
+        self._done_font = QFont(self._key_font)
+        self._done_font.setBold(True)
 
         self.target_widget = None # The QLineEdit this keyboard is attached to
-        self.setLayout(grid)
-        # Adjust size after adding widgets, but consider setting a min width/height
-        self.adjustSize()
-        self.setMinimumWidth(600) # Ensure a reasonable minimum width
+        self._size_hint = None # Cached sizeHint (the layout never changes after construction)
+        self.setMinimumSize(600, 250) # Ensure a reasonable minimum size
+        self.resize(self.sizeHint())
+
+    def _layout_keys(self):
+        """Computes the rectangle of every key for the current widget size."""
+        m, sp = self.MARGIN, self.SPACING
+        self._cell_w = cell_w = (self.width() - 2 * m) / self.GRID_COLS
+        self._cell_h = cell_h = (self.height() - 2 * m) / self.GRID_ROWS
+        self._key_rects = [
+            QRect(int(m + c * cell_w), int(m + r * cell_h),
+                  int(span * cell_w) - sp, int(cell_h) - sp)
+            for _, r, c, span in self.KEYS
+        ]
+
+    def _key_at(self, pos):
+        """Returns the index in KEYS of the key under pos, or -1 (O(1) through the cell table)."""
+        col = int((pos.x() - self.MARGIN) // self._cell_w)
+        row = int((pos.y() - self.MARGIN) // self._cell_h)
+        if not (0 <= col < self.GRID_COLS and 0 <= row < self.GRID_ROWS):
+            return -1
+        idx = self.CELL_TO_KEY[row * self.GRID_COLS + col]
+        # Ignore presses in the spacing between keys
+        if idx >= 0 and not self._key_rects[idx].contains(pos):
+            return -1
+        return idx
+
+    def paintEvent(self, event):
+        """Paints the background and all the keys in one pass."""
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), self.BG_COLOR)
+        painter.setPen(self.BORDER_COLOR)
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+        key_pen = QPen(self.KEY_BORDER_COLOR)
+        text_pen = QPen(self.TEXT_COLOR)
+        done_key = self.DONE_KEY
+        pressed_idx = self._pressed_idx
+        for idx, ((label, _, _, _), rect) in enumerate(zip(self.KEYS, self._key_rects)):
+            if label == done_key:
+                fill = self.DONE_PRESSED_COLOR if idx == pressed_idx else self.DONE_COLOR
+                font = self._done_font
+            else:
+                fill = self.KEY_PRESSED_COLOR if idx == pressed_idx else self.KEY_COLOR
+                font = self._backspace_font if label == "←" else self._key_font
+            painter.setPen(key_pen)
+            painter.setBrush(fill)
+            painter.drawRoundedRect(rect, 5, 5)
+            painter.setPen(text_pen)
+            painter.setFont(font)
+            painter.drawText(rect, Qt.AlignCenter, label)
+        painter.end()
+
+    def mousePressEvent(self, event):
+        """Highlights the pressed key (the key fires on release, like a QPushButton)."""
+        if event.button() == Qt.LeftButton:
+            idx = self._key_at(event.pos())
+            if idx != self._pressed_idx:
+                self._pressed_idx = idx
+                self.update()
+            event.accept()
+        else:
+            super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        """Fires the key if the press is released over the same key."""
+        if event.button() != Qt.LeftButton:
+            super().mouseReleaseEvent(event)
+            return
+        idx = self._pressed_idx
+        self._pressed_idx = -1
+        if idx >= 0:
+            self.update(self._key_rects[idx])
+            if self._key_at(event.pos()) == idx:
+                key = self.KEYS[idx][0]
+                if key == self.DONE_KEY:
+                    self.hide_keyboard()
+                else:
+                    self._emit_key(key)
+        event.accept()
 
     def _emit_key(self, key):
         """Emits the pressed key signal."""
@@ -156,7 +425,8 @@ class VirtualKeyboard(QWidget):
         global_pos = self.target_widget.mapToGlobal(target_rect.bottomLeft())
 
         kb_size = self.sizeHint() # Preferred size
-        screen_geometry = QApplication.desktop().availableGeometry(self.target_widget)
+        # Interrogato a ogni apertura: la finestra puo' cambiare monitor o area di lavoro
+        screen_geometry = self.target_widget.screen().availableGeometry()
 
         # Default position: directly below the target
         kb_x = global_pos.x()
@@ -185,29 +455,93 @@ class VirtualKeyboard(QWidget):
 
     def hide_keyboard(self):
         """Hides the keyboard and emits the closed signal."""
-        print("VirtualKeyboard: hide_keyboard() chiamato") # <-- AGGIUNGI QUESTO
+        log.debug("VirtualKeyboard: hide_keyboard() chiamato")
         if not self.isVisible():
-            print("VirtualKeyboard: Già non visibile.") # <-- AGGIUNGI QUESTO
+            log.debug("VirtualKeyboard: Già non visibile.")
             return
         # ... resto del metodo ...
         self.hide()
         self.target_widget = None # Clear the target widget reference
         self.closed.emit()
-        print("VirtualKeyboard: Nascosta.") # <-- AGGIUNGI QUESTO
+        log.debug("VirtualKeyboard: Nascosta.")
 
     def sizeHint(self):
          """Provide a reasonable default size hint."""
-         # Calculate hint based on layout, but enforce minimums
-         hint = self.layout().sizeHint()
-         min_width = 600
-         min_height = 250 # Adjusted for touch-friendlier buttons
-         return hint.expandedTo(QSize(min_width, min_height))
+         if self._size_hint is None:
+             # 50 px per key column, touch-friendly rows
+             self._size_hint = QSize(self.GRID_COLS * 52 + 2 * self.MARGIN,
+                                     self.GRID_ROWS * 50 + 2 * self.MARGIN)
+         return self._size_hint
+
+    def resizeEvent(self, event):
+         """Recomputes the key rectangles for the new size."""
+         self._layout_keys()
+         super().resizeEvent(event)
 
     # Override closeEvent if needed, e.g., if using Qt.Window instead of Qt.Popup
     # def closeEvent(self, event):
     #     self.hide_keyboard()
     #     event.accept()
 
+# -------------------- Track List Model --------------------
+class TrackListModel(QAbstractListModel):
+    """Read-only list model over a Python list of Track objects (playlist or history).
+
+    The view asks for the text/tooltip of the visible rows only, so no per-row
+    item objects are created. The list is owned by Jukebox and changed in place:
+    call reset() after modifying it.
+    """
+
+    def __init__(self, tracks, show_ids=False, parent=None):
+        super().__init__(parent)
+        self._tracks = tracks
+        self._show_ids = show_ids # History tooltips show the identifier instead of URL/page
+
+    def reset(self, tracks=None):
+        """Tells the views that the whole list changed (optionally pointing to a new list)."""
+        self.beginResetModel()
+        if tracks is not None:
+            self._tracks = tracks
+        self.endResetModel()
+
+    def append_tracks(self, new_tracks):
+        """Appends new_tracks to the underlying list, notifying the views with a single row insertion."""
+        first = len(self._tracks)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_tracks) - 1)
+        self._tracks.extend(new_tracks)
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._tracks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        row = index.row()
+        if not index.isValid() or row >= len(self._tracks):
+            return None
+        track = self._tracks[row]
+        if role == Qt.DisplayRole:
+            # Format duration string
+            duration_str = ""
+            if track.duration_sec is not None and track.duration_sec > 0:
+                 duration_str = f" ({Jukebox._fmt_time(track.duration_sec * 1000)})"
+            # Format title with local indicator if needed
+            prefix = "[L] " if track.is_local else ""
+            return f"{prefix}{track.title}{duration_str}"
+        if role == Qt.UserRole:
+            # Track identifier (webpage_url or url), used by _history_double_clicked
+            return track.identifier
+        if role == Qt.ToolTipRole:
+            tooltip_text = f"Titolo: {track.title}\n"
+            if self._show_ids:
+                tooltip_text += f"ID: {track.identifier}\n"
+            else:
+                tooltip_text += f"URL/Path: {track.url}\n"
+                if track.webpage_url and track.webpage_url != track.url:
+                     tooltip_text += f"Pagina Web: {track.webpage_url}\n"
+            tooltip_text += f"Locale: {'Sì' if track.is_local else 'No'}"
+            return tooltip_text
+        return None
+
 # -------------------- Main Jukebox Widget --------------------
 class Jukebox(QWidget):
     # --- Signals for cross-thread communication ---
@@ -217,10 +551,12 @@ class Jukebox(QWidget):
     add_tracks_to_playlist_signal = pyqtSignal(list)
     # Add a played Track object to history (from playback logic)
     add_to_history_signal = pyqtSignal(Track)
-    # Update duration for a local file after probing (from FileProbeWorker)
-    update_probe_duration_signal = pyqtSignal(str, int) # path, duration_ms
+    # Update duration for a local file after probing (from FileProbeTask)
+    update_probe_duration_signal = pyqtSignal(object, dict) # (FileProbeTask, {path: duration_ms}) for a probe batch
     # Signal a playback error occurred (from VLC events or playback logic)
     playback_error_signal = pyqtSignal(str)
+    # Forward a libvlc event type from VLC's callback thread to the main thread
+    media_event_signal = pyqtSignal(object, tuple) # event type, extra event values
 
     def __init__(self):
         super().__init__()
@@ -238,65 +574,108 @@ class Jukebox(QWidget):
             return
         self.player = vlc_instance.media_player_new()
         if self.player is None:
-             print("FATAL ERROR: Player instance creation failed.")
+             log.critical("Player instance creation failed.")
              self._error("Impossibile creare un player VLC. Riavvia l'applicazione.")
              QTimer.singleShot(100, self.close)
              return
 
         # --- VLC Event Handling ---
         self.event_manager = self.player.event_manager()
-        # Use lambda with QTimer.singleShot to ensure handler runs in main Qt thread
-        self.event_manager.event_attach(vlc.EventType.MediaPlayerEndReached,
-                                        lambda event: QTimer.singleShot(0, lambda: self._on_media_event(vlc.EventType.MediaPlayerEndReached, event)))
-        self.event_manager.event_attach(vlc.EventType.MediaPlayerEncounteredError,
-                                        lambda event: QTimer.singleShot(0, lambda: self._on_media_event(vlc.EventType.MediaPlayerEncounteredError, event)))
+        # VLC callbacks run on libvlc's own thread: never touch the player or the UI there.
+        # Only emit a queued signal so _on_media_event runs in the main Qt thread
+        # and the libvlc event dispatcher is released immediately.
+        self.media_event_signal.connect(self._on_media_event, Qt.QueuedConnection)
+        # python-vlc passes the extra event_attach args to the callback: one bound method, no closures
+        for event_type in _PLAYER_EVENTS:
+            self.event_manager.event_attach(event_type, self._forward_vlc_event, event_type)
         # Optional: Add more event listeners if needed (e.g., Buffering, PositionChanged)
         # self.event_manager.event_attach(vlc.EventType.MediaPlayerBuffering,
-        #                                 lambda event: QTimer.singleShot(0, lambda: self._on_media_event(vlc.EventType.MediaPlayerBuffering, event, event.u.new_cache)))
+        #                                 lambda event: self.media_event_signal.emit(vlc.EventType.MediaPlayerBuffering, (event.u.new_cache,)))
         # self.event_manager.event_attach(vlc.EventType.MediaPlayerPositionChanged,
-        #                                 lambda event: QTimer.singleShot(0, lambda: self._on_media_event(vlc.EventType.MediaPlayerPositionChanged, event, event.u.new_position)))
+        #                                 lambda event: self.media_event_signal.emit(vlc.EventType.MediaPlayerPositionChanged, (event.u.new_position,)))
 
 
         # --- Load Data ---
         try:
             # Load data using functions from jukebox_data, passing the Track class for conversion
-            self.playlist = load_json("playlist.json", Track)
-            self.history = load_json("history.json", Track)
-            self.favorites = load_json("favorites.json", Track)
-            print(f"Loaded {len(self.playlist)} playlist items, {len(self.history)} history items, {len(self.favorites)} favorites.")
+            # The three files are read concurrently (the disk reads overlap)
+            with ThreadPoolExecutor(max_workers=3) as ex:
+                fut_p = ex.submit(load_json, "playlist.json", Track)
+                fut_h = ex.submit(load_json, "history.json", Track)
+                fut_f = ex.submit(load_json, "favorites.json", Track)
+                self.playlist, self.history, self.favorites = fut_p.result(), fut_h.result(), fut_f.result()
+            log.info("Loaded %s playlist items, %s history items, %s favorites.", len(self.playlist), len(self.history), len(self.favorites))
         except Exception as e:
-            print(f"Errore durante il caricamento dei file JSON: {e}")
+            log.error("Errore durante il caricamento dei file JSON: %s", e)
             self._error(f"Errore durante il caricamento dei dati (playlist, storia, preferiti): {e}.\nI dati potrebbero essere resettati o incompleti.")
             # Initialize empty lists on error to prevent crashes
             self.playlist = []
             self.history = []
             self.favorites = []
 
+        # Identificatori dei preferiti: controllo "già presente" in O(1), aggiornato in add_to_favorites
+        self._fav_ids = {fav.identifier for fav in self.favorites}
+
         # --- State Variables ---
         self.current_idx = -1 # Index of the currently playing/paused track in playlist
         self.seeking = False # True while user is dragging the progress slider
         self.is_playing = False # Reflects player state (Playing vs Paused/Stopped/etc.)
         self.current_track_info = None # Holds the Track object currently loaded/playing
+        self._history_version = 0 # Bumped on every change to self.history
+        self._history_shown_version = -1 # Version currently rendered in history_list
 
         # --- Worker References ---
         # Hold references to workers to manage their lifecycle (e.g., cancellation)
         self.yt_search_worker = None
         self.cover_worker = None
-        self.probe_workers = [] # Can have multiple file probes running
+        self._cover_decode_path = None # Cached cover being decoded off-thread (older results are ignored)
+        self._cover_decode_url = None
+        self._cover_cache = collections.OrderedDict() # thumbnail_url -> QPixmap scaled for cover_lbl (LRU)
+        self._probe_tasks = set() # FileProbeTasks still running on the global QThreadPool
+        self._probe_targets = {} # Probed path -> Tracks waiting for its duration (O(1) lookup on completion)
         self.is_searching = False
         self.context_download_worker = None
+        self._download_index = None # Nomi dei file in DOWNLOAD_DIR, letti alla prima ricerca (vedi _download_names)
+        # Tracce ricevute una alla volta dal worker di ricerca, inserite in blocco ogni 50 ms
+        self._search_batch = []
+        self._search_start_index = 0 # Indice in playlist della prima traccia della ricerca corrente
+        self._search_autoplayed = False
+        self._search_batch_timer = QTimer(self)
+        self._search_batch_timer.setSingleShot(True)
+        self._search_batch_timer.setInterval(50)
+        self._search_batch_timer.timeout.connect(self._flush_search_batch)
+        # Timer single-shot persistenti (riavviati sul posto invece di un QTimer nuovo per ogni evento)
+        self._next_timer = QTimer(self) # play_next dopo EndReached/errore: più eventi ravvicinati -> un solo play_next
+        self._next_timer.setSingleShot(True)
+        self._next_timer.timeout.connect(self.play_next)
+        self._seek_clear_timer = QTimer(self) # Reset del flag seeking dopo un seek
+        self._seek_clear_timer.setSingleShot(True)
+        self._seek_clear_timer.timeout.connect(self._clear_seeking)
+        self._seek_refresh_timer = QTimer(self) # Aggiornamento del tempo dopo un seek in pausa
+        self._seek_refresh_timer.setSingleShot(True)
+        self._seek_refresh_timer.timeout.connect(self._update_progress)
+        self._query_clear_timer = QTimer(self) # Cancella query_lbl se mostra ancora _query_clear_marker
+        self._query_clear_timer.setSingleShot(True)
+        self._query_clear_timer.timeout.connect(self._clear_query_label)
+        self._query_clear_marker = None
+        self._volume_timer = QTimer(self) # Limita audio_set_volume a ~20 Hz durante trascinamento/tasto tenuto
+        self._volume_timer.setSingleShot(True)
+        self._volume_timer.setInterval(50)
+        self._volume_timer.timeout.connect(self._apply_slider_volume)
+        self._applied_volume = None # Last value passed to VLC (see _set_volume)
         # --- Virtual Keyboard ---
-        self.vkbd = VirtualKeyboard()
-        self.vkbd.key_pressed.connect(self._vk_input) # Connect keyboard output to input handler
-        # Optional: self.vkbd.closed.connect(self.on_vkbd_closed) # Handle keyboard closing if needed
+        self.vkbd = None # Built on first focus of the search input (see _get_vkbd)
+        self._vk_dispatch = {"←": self._vk_backspace} # Special keys (add handlers here if needed)
 
         # --- Dragging Frameless Window ---
         self.dragging = False
         self.drag_pos = QPoint() # Stores the offset when dragging starts
+        self._drag_rect = None # Cached header drag area (see _header_drag_rect)
+        self._last_time_str = None # Last text shown in time_lbl (see _set_time_text)
 
         # --- Initialize UI ---
-        self._style()     # Apply CSS styles
         self._ui()        # Create and layout widgets
+        self._install_btn_qss() # Gradient button rules, one stylesheet update for the whole UI
         self._shortcuts() # Setup keyboard shortcuts
         self._timer()     # Start UI update timer (for progress bar etc.)
 
@@ -330,11 +709,11 @@ class Jukebox(QWidget):
             screen = QApplication.desktop().screenGeometry()
             self.move(screen.center() - self.rect().center())
         except Exception as e:
-             print(f"Warning: Could not center window: {e}")
+             log.warning("Could not center window: %s", e)
 
-    def mousePressEvent(self, event):
-        """Handles mouse press for dragging the frameless window."""
-        if event.button() == Qt.LeftButton:
+    def _header_drag_rect(self):
+        """Returns the draggable header area, computed once and invalidated by resizeEvent."""
+        if self._drag_rect is None:
             # Define the draggable area (e.g., top 50 pixels, excluding buttons)
             header_height = 50 # Adjust as needed
             # Make draggable area slightly dynamic based on search bar position
@@ -350,16 +729,21 @@ class Jukebox(QWidget):
                          header_height = max(20, header_height) # Ensure minimum drag height
                  except Exception:
                       header_height = 50 # Fallback
+            self._drag_rect = QRect(0, 0, self.width(), header_height)
+        return self._drag_rect
 
-            header_drag_area = QRect(0, 0, self.width(), header_height)
+    def resizeEvent(self, event):
+        """Invalidates the cached drag area (the layout geometry changes with the window size)."""
+        self._drag_rect = None
+        super().resizeEvent(event)
 
-            # Check if click is within the drag area AND not on an interactive widget (like close button)
+    def mousePressEvent(self, event):
+        """Handles mouse press for dragging the frameless window."""
+        if event.button() == Qt.LeftButton and self._header_drag_rect().contains(event.pos()):
+            # Click is within the drag area: check it's not on an interactive widget (like close button).
+            # Interactive widgets are tagged with the "noDrag" property when created.
             widget_at_click = self.childAt(event.pos())
-            is_on_button = isinstance(widget_at_click, QPushButton)
-            is_on_spinbox = isinstance(widget_at_click, QSpinBox)
-            # Add other widgets to exclude if necessary
-
-            if header_drag_area.contains(event.pos()) and not (is_on_button or is_on_spinbox):
+            if widget_at_click is None or not widget_at_click.property("noDrag"):
                 self.dragging = True
                 # Calculate offset from window top-left to click position
                 self.drag_pos = event.globalPos() - self.frameGeometry().topLeft()
@@ -389,233 +773,66 @@ class Jukebox(QWidget):
         else:
             super().mouseReleaseEvent(event)
 
-    # --- UI Styling and Creation ---
-    def _style(self):
-        """Applies CSS styling to the widgets."""
-        self.setStyleSheet("""
-        QWidget {
-            background-color: #1e1e1e; /* Dark background */
-            color: #e0e0e0; /* Light grey text */
-            font-family: Arial, sans-serif; /* Consistent font */
-            font-size: 14px; /* Base font size */
-        }
-        QPushButton {
-            background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #4a4a4a, stop:1 #333);
-            border: 1px solid #555;
-            border-radius: 6px; /* Slightly less rounded */
-            padding: 8px 16px; /* Comfortable padding */
-            font-size: 15px; /* Button text size */
-            color: white;
-            min-height: 30px; /* Ensure minimum height */
-        }
-        QPushButton:hover {
-            background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #5a5a5a, stop:1 #444);
-            border: 1px solid #777;
-        }
-        QPushButton:pressed {
-            background-color: #2a2a2a;
-            border: 1px solid #444;
-        }
-        QPushButton:disabled {
-            background-color: #444;
-            color: #888;
-            border: 1px solid #555;
-        }
-
-        QSlider::groove:horizontal {
-            border: 1px solid #444;
-            height: 8px; /* Thinner groove */
-            background: #3a3a3a;
-            margin: 2px 0;
-            border-radius: 4px;
-        }
-        QSlider::handle:horizontal {
-            background: #00cc66; /* Bright green handle */
-            border: 1px solid #00994d;
-            width: 18px; /* Handle width */
-            margin: -6px 0; /* Vertical centering */
-            border-radius: 9px; /* Circular handle */
-        }
-        QSlider::handle:horizontal:hover {
-            background: #33ff99;
-            border: 1px solid #00cc66;
-        }
-        QSlider::handle:horizontal:disabled {
-             background: #666;
-             border: 1px solid #555;
-        }
-
-        QListWidget {
-            background-color: #2e2e2e;
-            border: 1px solid #444;
-            border-radius: 8px;
-            padding: 5px;
-            color: #e0e0e0;
-            font-size: 14px;
-            alternate-background-color: #333333; /* Subtle row alternation */
-        }
-        QListWidget::item {
-            padding: 6px 4px; /* Item padding */
-            border-bottom: 1px solid #3a3a3a; /* Separator */
-            color: #e0e0e0;
-        }
-        QListWidget::item:last { border-bottom: none; } /* No border on last item */
-        QListWidget::item:selected {
-            background-color: #0078d7; /* Selection color */
-            color: white;
-            border-radius: 3px;
-        }
-        QListWidget::item:hover {
-            background-color: #3e3e3e; /* Hover color */
-            border-radius: 3px;
-        }
-
-        QLabel { color: #e0e0e0; } /* Default label color */
-        QLabel#cover_lbl {
-            border: 2px solid #444;
-            border-radius: 10px;
-            background-color: #282828; /* Darker background for cover area */
-            min-width: 300px; /* Minimum cover size */
-            min-height: 169px;
-        }
-        QLabel#title_label { /* Specific style for main title */
-            color: #00e673; /* Bright green title */
-            font-size: 22px;
-            font-weight: bold;
-            padding-bottom: 5px; /* Space below title */
-        }
-        QLabel#info_lbl { /* Style for track title/duration */
-            font-size: 15px;
-            min-height: 2.5em; /* Ensure space for two lines */
-            padding: 5px;
-            color: #cccccc; /* Slightly dimmer info text */
-        }
-        QLabel#time_lbl { font-size: 13px; color: #bbbbbb; }
-        QLabel#query_lbl { /* Style for status/progress messages */
-            color: #00cc66; /* Green status text */
-            font-size: 14px;
-            min-height: 1.2em;
-            padding: 2px;
-        }
-
-        QLineEdit {
-            padding: 8px 10px;
-            border: 1px solid #555;
-            border-radius: 5px;
-            background-color: #333;
-            color: white;
-            font-size: 16px; /* Larger search input text */
-        }
-        QLineEdit:focus { border: 1px solid #0078d7; } /* Highlight on focus */
-
-        QSpinBox {
-            padding: 5px 8px;
-            border: 1px solid #555;
-            border-radius: 5px;
-            background: #333;
-            color: white;
-            font-size: 14px;
-            min-width: 50px; /* Min width for spinbox */
-        }
-        QSpinBox::up-button, QSpinBox::down-button { width: 18px; } /* Size of arrows */
-        QSpinBox::up-button:hover, QSpinBox::down-button:hover { background-color: #555; }
-
-        /* Specific Button Styles */
-        QPushButton#play_pause_btn { font-weight: bold; font-size: 16px; }
-        QPushButton#add_fav_btn { background-color: #4CAF50; border-color: #388E3C; }
-        QPushButton#add_fav_btn:hover { background-color: #5cd65c; }
-        QPushButton#add_fav_btn:pressed { background-color: #388E3C; }
-        QPushButton#close_button { /* Style for 'X' close button */
-            background-color: #e81123; /* Red */
-            border: 1px solid #a3000f;
-            border-radius: 15px; /* Circular */
-            font-size: 14px;
-            font-weight: bold;
-            padding: 0; /* Remove padding */
-            color: white;
-            min-width: 30px; min-height: 30px; /* Fixed size */
-            max-width: 30px; max-height: 30px;
-        }
-        QPushButton#close_button:hover { background-color: #f14c59; border-color: #c00; }
-        QPushButton#close_button:pressed { background-color: #a3000f; border-color: #800; }
-
-        QCheckBox { color: #e0e0e0; spacing: 8px; /* Space between indicator and text */ }
-        QCheckBox::indicator { width: 18px; height: 18px; }
-        QCheckBox::indicator:unchecked {
-            background-color: #444; border: 1px solid #666; border-radius: 3px;
-        }
-        QCheckBox::indicator:checked {
-            background-color: #00cc66; border: 1px solid #00994d; border-radius: 3px;
-        }
-        /* Simple visual checkmark using font character (or border trick) */
-        QCheckBox::indicator:checked::after {
-             /* content: '✔'; */ /* Using a character */
-             /* color: black; */
-             /* position: relative; left: 3px; top: -1px; */
-             /* OR Border trick (adjust positioning) */
-             content: ""; display: block; position: relative;
-             left: 6px; top: 3px; width: 4px; height: 8px;
-             border: solid white; border-width: 0 2px 2px 0;
-             transform: rotate(45deg);
-        }
-        QCheckBox:disabled { color: #888; }
-        QCheckBox::indicator:disabled { background-color: #3a3a3a; border: 1px solid #555; }
-        QCheckBox::indicator:checked:disabled { background-color: #558870; border: 1px solid #446655; }
-        QCheckBox::indicator:checked:disabled::after { border-color: #aaa; }
-
-        QMessageBox { background-color: #2e2e2e; }
-        QMessageBox QLabel { color: white; font-size: 14px; }
-        QMessageBox QPushButton { font-size: 14px; padding: 6px 12px; min-width: 80px;}
-
-        QInputDialog { background-color: #2e2e2e; }
-        QInputDialog QLabel { color: white; font-size: 14px; }
-        QInputDialog QComboBox { background-color: #333; color: white; border: 1px solid #555; padding: 5px;}
-        QInputDialog QLineEdit { /* Inherits base style, fine */ }
-        QInputDialog QPushButton { font-size: 14px; padding: 6px 12px; min-width: 80px;}
-
-        /* Style for the loading indicator */
-        QLabel#loading_lbl { /* Add if needed */ }
-
-        """)
+    # --- UI Creation ---
 
+    # Gradient variants already registered in the application stylesheet: (color_start, color_end, object_name) -> objectName
+    _btn_qss_cache = {}
+    # Gradient rules generated by _btn and not yet installed (see _install_btn_qss)
+    _pending_btn_qss = []
 
     def _btn(self, text, fn, w=None, color_start=None, color_end=None, object_name=None):
         """Helper function to create styled QPushButtons."""
         b = QPushButton(text)
+        b.setProperty("noDrag", True) # Clicks never start a window drag (see mousePressEvent)
         b.clicked.connect(fn)
         if object_name:
             b.setObjectName(object_name)
         # Apply specific gradient if colors are provided
         if color_start and color_end:
-            # Lighter hover colors
-            hover_start = QColor(color_start).lighter(120).name()
-            hover_end = QColor(color_end).lighter(120).name()
-            # Darker pressed color
-            pressed_color = QColor(color_end).darker(150).name()
-            # Base object name selector or just QPushButton
-            selector = f"QPushButton#{object_name}" if object_name else "QPushButton"
-
-            # Construct style string (overrides base style for this button)
-            # Use triple quotes for multi-line f-string
-            button_style = f"""
-            {selector} {{
-                background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 {color_start}, stop:1 {color_end});
-            }}
-            {selector}:hover {{
-                background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 {hover_start}, stop:1 {hover_end});
-            }}
-            {selector}:pressed {{
-                background-color: {pressed_color};
-            }}
-            """
-            # Apply the specific style (append to existing or set)
-            current_style = b.styleSheet()
-            b.setStyleSheet(current_style + button_style) # Append specific style
+            key = (color_start, color_end, object_name)
+            style_name = Jukebox._btn_qss_cache.get(key)
+            if style_name is None:
+                # First button with this gradient: queue its rules for the application stylesheet
+                # (no per-widget setStyleSheet, which re-polishes the button)
+                style_name = object_name or "grad_" + "".join(ch for ch in color_start + color_end if ch.isalnum())
+                # Lighter hover colors
+                hover_start = QColor(color_start).lighter(120).name()
+                hover_end = QColor(color_end).lighter(120).name()
+                # Darker pressed color
+                pressed_color = QColor(color_end).darker(150).name()
+                selector = f"QPushButton#{style_name}"
+
+                # Construct style string (overrides base style for this button)
+                # Use triple quotes for multi-line f-string
+                button_style = f"""
+                {selector} {{
+                    background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 {color_start}, stop:1 {color_end});
+                }}
+                {selector}:hover {{
+                    background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 {hover_start}, stop:1 {hover_end});
+                }}
+                {selector}:pressed {{
+                    background-color: {pressed_color};
+                }}
+                """
+                Jukebox._pending_btn_qss.append(button_style)
+                Jukebox._btn_qss_cache[key] = style_name
+            b.setObjectName(style_name)
 
         if w: # Set fixed width if provided
             b.setFixedWidth(w)
         return b
 
+    @staticmethod
+    def _install_btn_qss():
+        """Appends the queued gradient rules to the application stylesheet in a single setStyleSheet call."""
+        if not Jukebox._pending_btn_qss:
+            return
+        # Ogni setStyleSheet ri-parsa l'intero foglio e ri-polisce tutti i widget: farlo una volta sola
+        app = QApplication.instance()
+        app.setStyleSheet(app.styleSheet() + "".join(Jukebox._pending_btn_qss))
+        Jukebox._pending_btn_qss.clear()
+
     def _ui(self):
         """Creates and lays out the user interface widgets."""
         root = QVBoxLayout(self)
@@ -631,13 +848,13 @@ class Jukebox(QWidget):
         self.loading_movie = None
         if gif_path.exists():
             self.loading_movie = QMovie(str(gif_path))
+            self.loading_movie.setCacheMode(QMovie.CacheAll) # Frames decoded once, then reused on every loop
+            self.loading_movie.setScaledSize(QSize(32, 32)) # Scaled while decoding, not on every paint
             self.loading_lbl.setMovie(self.loading_movie)
             self.loading_lbl.setFixedSize(32, 32) # Adjust size as needed
-            self.loading_lbl.setScaledContents(True)
-            self.loading_movie.start() # Start animation
-            self.loading_lbl.hide() # Initially hidden
+            self.loading_lbl.hide() # Initially hidden (animation started by _show_loading)
         else:
-             print(f"Warning: Loading GIF not found at {gif_path}. Loading indicator disabled.")
+             log.warning("Loading GIF not found at %s. Loading indicator disabled.", gif_path)
              self.loading_lbl.setText("...") # Fallback text
              self.loading_lbl.setFixedSize(32, 32)
              self.loading_lbl.setAlignment(Qt.AlignCenter)
@@ -655,7 +872,8 @@ class Jukebox(QWidget):
         # Close Button
         close_btn = QPushButton("X", objectName="close_button") # Use object name for styling
         close_btn.setFixedSize(30, 30) # Ensure size matches style
-        #close_btn.setStyleSheet("...") # Style defined in _style() by object name
+        close_btn.setProperty("noDrag", True)
+        #close_btn.setStyleSheet("...") # Style defined in _MAIN_QSS by object name
         close_btn.setToolTip("Chiudi Applicazione")
         close_btn.clicked.connect(self.close)
         hdr.addWidget(close_btn, 0, Qt.AlignRight | Qt.AlignTop) # Align top-right
@@ -673,9 +891,9 @@ class Jukebox(QWidget):
         sr.addWidget(self._btn("Cerca", self.search_song, 100)) # Search button
         sr.addWidget(self._btn("Apri File", self._import_files, 100)) # Import button
 
-        # Download Checkbox (MP3) - Enabled based on FFMPEG_PATH from jukebox_data
+        # Download Checkbox (MP3) - Enabled based on ffmpeg_path() from jukebox_data
         self.download_checkbox = QCheckBox("Download MP3") # Text updated
-        if FFMPEG_PATH:
+        if ffmpeg_path():
             self.download_checkbox.setChecked(False) # Default unchecked
             self.download_checkbox.setToolTip("Se selezionato, scarica l'audio in formato MP3 nella cartella 'data/downloads' quando si cerca tramite URL diretto.\nRichiede FFmpeg installato e nel PATH.")
             self.download_checkbox.setEnabled(True)
@@ -689,6 +907,7 @@ class Jukebox(QWidget):
         # YouTube Results Count SpinBox
         sr.addWidget(QLabel("Ris. YT:"))
         self.spin = QSpinBox()
+        self.spin.setProperty("noDrag", True)
         self.spin.setRange(1, 50) # Min/Max results
         self.spin.setValue(10)    # Default results
         self.spin.setToolTip("Numero massimo di risultati da mostrare per le ricerche testuali su YouTube.")
@@ -702,7 +921,7 @@ class Jukebox(QWidget):
 
         # --- Status/Query Label ---
         self.query_lbl = QLabel("", alignment=Qt.AlignCenter, objectName="query_lbl")
-        # self.query_lbl.setStyleSheet(...) # Style defined in _style() by object name
+        # self.query_lbl.setStyleSheet(...) # Style defined in _MAIN_QSS by object name
         root.addWidget(self.query_lbl)
 
         # --- Media Player Area (Cover, Info, Progress, Volume, Controls) ---
@@ -721,7 +940,7 @@ class Jukebox(QWidget):
         info_progress_area.addWidget(self.cover_lbl)
 
         self.info_lbl = QLabel("Titolo: -\nDurata: -", alignment=Qt.AlignCenter, objectName="info_lbl")
-        # self.info_lbl.setStyleSheet(...) # Style in _style()
+        # self.info_lbl.setStyleSheet(...) # Style in _MAIN_QSS
         info_progress_area.addWidget(self.info_lbl)
 
         # Progress Bar Layout
@@ -747,7 +966,7 @@ class Jukebox(QWidget):
         self.vol = QSlider(Qt.Horizontal, objectName="volumeSlider") # Object name for specific handle style
         self.vol.setRange(0, 100)
         self.vol.setValue(80) # Default volume
-        self.vol.valueChanged.connect(self._set_volume)
+        self.vol.valueChanged.connect(self._on_volume_changed)
         self.vol.setToolTip("Regola Volume")
         self.vol.setFixedWidth(180) # Fixed width for volume slider
         vol_layout.addWidget(self.vol)
@@ -797,14 +1016,18 @@ class Jukebox(QWidget):
         queue_vbox = QVBoxLayout()
         queue_vbox.setSpacing(5)
         queue_vbox.addWidget(QLabel("Playlist (Doppio Click per Riprodurre):"))
-        self.queue = QListWidget()
+        self.queue = QListView()
+        self._queue_model = TrackListModel(self.playlist, parent=self)
+        self.queue.setModel(self._queue_model)
+        self.queue.setEditTriggers(QListView.NoEditTriggers)
+        # Single-line rows: all the same height, so the view doesn't measure every row,
+        # and layout happens in batches instead of all at once on a reset
+        self.queue.setUniformItemSizes(True)
+        self.queue.setLayoutMode(QListView.Batched)
         self.queue.setAlternatingRowColors(True) # Use alternating colors from style
-        self.queue.itemDoubleClicked.connect(self._queue_double_clicked)
+        self.queue.doubleClicked.connect(self._queue_double_clicked)
         self.queue.setContextMenuPolicy(Qt.CustomContextMenu)
         self.queue.customContextMenuRequested.connect(self._show_playlist_context_menu)
-        # Add context menu for removing items? (Optional)
-        # self.queue.setContextMenuPolicy(Qt.CustomContextMenu)
-        # self.queue.customContextMenuRequested.connect(self._show_playlist_context_menu)
         queue_vbox.addWidget(self.queue, 1) # List takes available vertical space
         lists.addLayout(queue_vbox, 1) # Playlist takes proportional horizontal space
 
@@ -812,9 +1035,14 @@ class Jukebox(QWidget):
         history_vbox = QVBoxLayout()
         history_vbox.setSpacing(5)
         history_vbox.addWidget(QLabel(f"Cronologia (Doppio Click per Aggiungere in Coda):")) # Max size info removed
-        self.history_list = QListWidget()
+        self.history_list = QListView()
+        self._history_model = TrackListModel(self.history, show_ids=True, parent=self)
+        self.history_list.setModel(self._history_model)
+        self.history_list.setEditTriggers(QListView.NoEditTriggers)
+        self.history_list.setUniformItemSizes(True)
+        self.history_list.setLayoutMode(QListView.Batched)
         self.history_list.setAlternatingRowColors(True)
-        self.history_list.itemDoubleClicked.connect(self._history_double_clicked)
+        self.history_list.doubleClicked.connect(self._history_double_clicked)
         # Add context menu for adding to playlist or favorites? (Optional)
         # self.history_list.setContextMenuPolicy(Qt.CustomContextMenu)
         # self.history_list.customContextMenuRequested.connect(self._show_history_context_menu)
@@ -832,8 +1060,8 @@ class Jukebox(QWidget):
         QShortcut(QKeySequence(Qt.Key_Left), self, activated=self.play_previous)
 
         # Volume Controls
-        QShortcut(QKeySequence(Qt.Key_Up), self, activated=lambda: self.vol.setValue(min(100, self.vol.value() + 5)))
-        QShortcut(QKeySequence(Qt.Key_Down), self, activated=lambda: self.vol.setValue(max(0, self.vol.value() - 5)))
+        QShortcut(QKeySequence(Qt.Key_Up), self, activated=self._vol_up)
+        QShortcut(QKeySequence(Qt.Key_Down), self, activated=self._vol_down)
 
         # Window Controls
         QShortcut(QKeySequence(Qt.Key_F11), self, activated=self.toggle_fullscreen)
@@ -846,71 +1074,97 @@ class Jukebox(QWidget):
         """Starts a timer to periodically update the UI (progress bar, time)."""
         self.t = QTimer(self)
         self.t.setInterval(200) # Update interval (milliseconds) - 5 times/sec
+        self.t.setTimerType(Qt.CoarseTimer) # Let Qt coalesce the wakeups with other timers
         self.t.timeout.connect(self._update_progress)
-        self.t.start()
+        # Not started here: it only runs while VLC is playing (started/stopped in _on_media_event)
 
     # --- UI Update Methods ---
+    def _set_time_text(self, text):
+        """Sets the time label only when the text changes (most ticks fall within the same second)."""
+        if text != self._last_time_str:
+            self._last_time_str = text
+            self.time_lbl.setText(text)
+
+    def _clear_query_later(self, ms, marker):
+        """Clears query_lbl after ms if it still contains marker (one pending clear at a time)."""
+        self._query_clear_marker = marker
+        self._query_clear_timer.start(ms)
+
+    def _clear_query_label(self):
+        if self._query_clear_marker and self._query_clear_marker in self.query_lbl.text():
+            self.query_lbl.setText("")
+        self._query_clear_marker = None
+
     def _update_progress(self):
         """Updates the progress slider and time labels based on player state."""
+        # Called 5 times/sec: bind the player and widgets to locals once
+        player = self.player
         # Avoid updates if player doesn't exist or user is dragging slider
-        if self.seeking or not self.player:
+        if self.seeking or not player:
             return
+        progress = self.progress
+        set_time_text = self._set_time_text
 
-        media = self.player.get_media()
+        media = player.get_media()
         if not media: # No media loaded
-             if self.progress.maximum() != 0: # Reset only if needed
-                 self.progress.setMaximum(0)
-                 self.progress.setValue(0)
-                 self.time_lbl.setText("00:00 / 00:00")
+             if progress.maximum() != 0: # Reset only if needed
+                 progress.setMaximum(0)
+                 progress.setValue(0)
+                 set_time_text("00:00 / 00:00")
              # Ensure play/pause button reflects stopped state if necessary
              if self.is_playing:
                   self.is_playing = False
                   self._update_play_pause_button()
              return
 
-        # Get player state and times
-        state = self.player.get_state()
-        pos_ms = self.player.get_time()      # Current time in ms
-        dur_ms = self.player.get_length()     # Total duration in ms
+        # Get player state
+        state = player.get_state()
 
         # --- Update Play/Pause Button ---
         # Check if the actual playing state changed
-        current_vlc_is_playing = (state == vlc.State.Playing)
+        current_vlc_is_playing = (state == _STATE_PLAYING)
         if current_vlc_is_playing != self.is_playing:
             self.is_playing = current_vlc_is_playing
             self._update_play_pause_button()
 
         # --- Update Progress Bar and Time Labels ---
         # Only update if playing, paused, or buffering (and duration is valid)
-        if state in (vlc.State.Playing, vlc.State.Paused, vlc.State.Buffering):
+        if state in _PROGRESS_STATES:
+            pos_ms = player.get_time()      # Current time in ms
+            dur_ms = player.get_length()    # Total duration in ms
+            fmt_time = self._fmt_time
             if dur_ms is not None and dur_ms > 0:
                  # Valid duration, update slider and labels
                  dur_sec = dur_ms // 1000
                  pos_sec = max(0, pos_ms // 1000 if pos_ms is not None else 0)
 
-                 # Update slider maximum only if it changed
-                 if self.progress.maximum() != dur_sec:
-                     self.progress.setMaximum(dur_sec)
-                 # Update slider position
-                 self.progress.setValue(pos_sec)
+                 # Update slider maximum/position/enabled only if they changed
+                 # (the getters are cheap, the setters repaint and re-resolve the style)
+                 if progress.maximum() != dur_sec:
+                     progress.setMaximum(dur_sec)
+                 if progress.value() != pos_sec:
+                     progress.setValue(pos_sec)
                  # Update time label
-                 self.time_lbl.setText(f"{self._fmt_time(pos_ms)} / {self._fmt_time(dur_ms)}")
-                 self.progress.setEnabled(True)
+                 set_time_text(f"{fmt_time(pos_ms)} / {fmt_time(dur_ms)}")
+                 if not progress.isEnabled():
+                     progress.setEnabled(True)
             else:
                  # No duration available (e.g., stream, radio, or not parsed yet)
                  # Show only current time, disable slider seeking
-                 self.progress.setMaximum(0) # Indicate unknown duration
-                 self.progress.setValue(0)
-                 self.progress.setEnabled(False) # Disable seeking
-                 pos_str = self._fmt_time(pos_ms) if pos_ms is not None else "00:00"
-                 self.time_lbl.setText(f"{pos_str} / --:--")
+                 if progress.maximum() != 0:
+                     progress.setMaximum(0) # Indicate unknown duration
+                     progress.setValue(0)
+                 if progress.isEnabled():
+                     progress.setEnabled(False) # Disable seeking
+                 pos_str = fmt_time(pos_ms) if pos_ms is not None else "00:00"
+                 set_time_text(f"{pos_str} / --:--")
         else:
             # Player is stopped, ended, error, etc.
-            if self.progress.maximum() != 0: # Reset only if needed
-                self.progress.setMaximum(0)
-                self.progress.setValue(0)
-                self.time_lbl.setText("00:00 / 00:00")
-                self.progress.setEnabled(False) # Disable seeking
+            if progress.maximum() != 0: # Reset only if needed
+                progress.setMaximum(0)
+                progress.setValue(0)
+                set_time_text("00:00 / 00:00")
+                progress.setEnabled(False) # Disable seeking
 
 
     @staticmethod
@@ -918,20 +1172,12 @@ class Jukebox(QWidget):
         """Formats milliseconds into HH:MM:SS or MM:SS string."""
         if ms is None or ms < 0:
              return "--:--" # Indicate invalid time
-
-        s = round(ms / 1000) # Round to nearest second
-        m, s = divmod(s, 60)
-        h, m = divmod(m, 60)
-
-        if h > 0:
-            return f"{h:d}:{m:02d}:{s:02d}" # HH:MM:SS
-        else:
-            return f"{m:02d}:{s:02d}"       # MM:SS
+        return _fmt_seconds(round(ms / 1000)) # Round to nearest second
 
     def _seek_finish(self):
         """Applies the seek when the user releases the progress slider."""
         if not self.player or not self.player.get_media() or not self.player.is_seekable():
-            print("Seek failed: Player not ready or media not seekable.")
+            log.debug("Seek failed: Player not ready or media not seekable.")
             self.seeking = False
             self._update_progress() # Refresh progress bar to actual position
             return
@@ -944,32 +1190,53 @@ class Jukebox(QWidget):
         # if dur_ms and dur_ms > 1000:
         #     target_ms = min(target_ms, dur_ms - 500) # Seek max 0.5s before end
 
-        print(f"Seeking to: {self._fmt_time(target_ms)} ({target_ms} ms)")
+        if log.isEnabledFor(logging.DEBUG): # _fmt_time only when the message is actually emitted
+            log.debug("Seeking to: %s (%d ms)", self._fmt_time(target_ms), target_ms)
         if self.player.set_time(target_ms) == 0:
-            print("Seek successful.")
+            log.debug("Seek successful.")
             # VLC might take a moment to update its internal time after seek.
             # Force an immediate progress update based on the target value.
             # self._update_progress() # This might show the old time briefly
         else:
-            print("Seek command failed.")
+            log.debug("Seek command failed.")
             # Update progress to reflect actual position if seek failed
             # self._update_progress()
 
         # Short delay before clearing seeking flag allows UI to potentially catch up
-        QTimer.singleShot(50, lambda: setattr(self, 'seeking', False))
+        self._seek_clear_timer.start(50)
+        if not self.t.isActive():
+            # Paused: the progress timer is stopped, refresh the time label once after the seek
+            self._seek_refresh_timer.start(100)
         # Set seeking false immediately if preferred:
         # self.seeking = False
 
+    def _clear_seeking(self):
+        self.seeking = False
+
     # --- VLC Event Handling Slot ---
-    def _on_media_event(self, event_type, event, *args):
-        """Handles events received from the VLC player."""
+    def _forward_vlc_event(self, event, event_type):
+        """VLC callback (libvlc thread): only posts the event to the main thread."""
+        self.media_event_signal.emit(event_type, ())
+
+    def _on_media_event(self, event_type, args=()):
+        """Handles events received from the VLC player (runs in the main Qt thread)."""
+        if event_type == vlc.EventType.MediaPlayerPlaying:
+            # Progress polling only while playing: no timer wakeups when paused/stopped
+            if not self.t.isActive():
+                self.t.start()
+            self._update_progress()
+            return
+        if event_type in _TIMER_STOP_EVENTS:
+            self.t.stop()
+            self._update_progress() # Final refresh (play/pause button, position)
+
         if event_type == vlc.EventType.MediaPlayerEndReached:
-            print("VLC Event: EndReached")
-            # Use QTimer to ensure play_next runs in the main thread event loop
-            QTimer.singleShot(50, self.play_next) # Small delay before playing next
+            log.debug("VLC Event: EndReached")
+            # Let VLC finish its end-of-media handling before loading the next track
+            self._next_timer.start(50) # Small delay before playing next (restart coalesces repeated events)
 
         elif event_type == vlc.EventType.MediaPlayerEncounteredError:
-            print("VLC Event: EncounteredError")
+            log.debug("VLC Event: EncounteredError")
             # Emit signal to handle the error safely in the main thread
             self.playback_error_signal.emit("Errore durante la riproduzione del brano. Potrebbe essere corrotto o non accessibile.")
 
@@ -994,21 +1261,41 @@ class Jukebox(QWidget):
 
     def _handle_playback_error(self, msg):
         """Handles playback errors signaled from VLC or playback logic."""
-        print(f"Handling playback error: {msg}")
+        log.debug("Handling playback error: %s", msg)
         self._error(msg) # Show error message box to user
         # Stop player and clear info
         if self.player:
              self.player.stop()
         self._clear_media_info()
         # Try to play the next track automatically after an error
-        QTimer.singleShot(100, self.play_next)
+        self._next_timer.start(100)
 
     # --- Volume Control ---
+    def _vol_up(self):
+        self.vol.setValue(min(100, self.vol.value() + 5))
+
+    def _vol_down(self):
+        self.vol.setValue(max(0, self.vol.value() - 5))
+
+    def _on_volume_changed(self, value):
+        """Applies slider changes right away, then at most once per 50 ms while they keep coming."""
+        if self._volume_timer.isActive():
+            return # _apply_slider_volume picks up the latest value when the timer fires
+        self._set_volume(value)
+        self._volume_timer.start()
+
+    def _apply_slider_volume(self):
+        value = self.vol.value()
+        if value != self._applied_volume:
+            self._set_volume(value)
+            self._volume_timer.start() # Keep the 50 ms spacing while changes continue
+
     def _set_volume(self, value):
         """Sets the player volume."""
+        self._applied_volume = value
         if self.player:
             if self.player.audio_set_volume(value) == -1:
-                 print(f"Error setting volume to {value}")
+                 log.error("Error setting volume to %s", value)
             # else: # Debug
             #      print(f"Volume set to {value}")
 
@@ -1019,7 +1306,7 @@ class Jukebox(QWidget):
             # Show keyboard when search input gains focus (e.g., by touch tap)
             if ev.type() == QEvent.FocusIn:
                 # Use singleShot to ensure focus is fully processed before showing keyboard
-                QTimer.singleShot(0, lambda: self.vkbd.show_keyboard(self.search_in))
+                QTimer.singleShot(0, lambda: self._get_vkbd().show_keyboard(self.search_in))
             # Hide keyboard when search input loses focus (maybe not needed if Qt.Popup used)
             # elif ev.type() == QEvent.FocusOut:
             #     # Check if focus is moving TO the keyboard itself
@@ -1035,17 +1322,27 @@ class Jukebox(QWidget):
 
         return super().eventFilter(obj, ev) # Pass event to base class
 
+    def _get_vkbd(self):
+        """Returns the virtual keyboard, creating it the first time it is needed."""
+        if self.vkbd is None:
+            self.vkbd = VirtualKeyboard()
+            self.vkbd.key_pressed.connect(self._vk_input) # Connect keyboard output to input handler
+            # Optional: self.vkbd.closed.connect(self.on_vkbd_closed) # Handle keyboard closing if needed
+        return self.vkbd
+
     def _vk_input(self, char):
         """Handles input received from the virtual keyboard."""
         target = self.vkbd.target_widget
         if target and isinstance(target, QLineEdit):
-            if char == "←": # Backspace
-                target.backspace()
-            elif char == " ": # Space
-                 target.insert(" ")
-            elif len(char) == 1: # Standard character
-                target.insert(char)
-            # Could add handling for other special keys if needed
+            # Special keys from the dispatch table, everything else is inserted as text
+            self._vk_dispatch.get(char, self._vk_insert)(target, char)
+
+    def _vk_backspace(self, target, _char):
+        target.backspace()
+
+    def _vk_insert(self, target, char):
+        if len(char) == 1: # Standard character (space included)
+            target.insert(char)
 
     # --- Search and Import ---
         # Dentro la classe Jukebox in jukebox_gui.py
@@ -1059,15 +1356,15 @@ class Jukebox(QWidget):
         # --- Check if already searching ---
         # Usa la variabile di stato self.is_searching
         if self.is_searching:
-             print("Warning: Ricerca già in corso. Annullamento precedente (se possibile).")
+             log.warning("Ricerca già in corso. Annullamento precedente (se possibile).")
              if self.yt_search_worker and hasattr(self.yt_search_worker, 'cancel') and self.yt_search_worker.isRunning():
                   try:
                       self.yt_search_worker.cancel()
                       # Non impostare self.is_searching = False qui,
                       # verrà fatto quando il worker annullato emette 'finished'.
-                      print("Segnale di annullamento inviato al worker precedente.")
+                      log.debug("Segnale di annullamento inviato al worker precedente.")
                   except RuntimeError: # Ignora se è già stato cancellato nel frattempo
-                      print("Warning: Impossibile annullare worker precedente (potrebbe essere già stato eliminato).")
+                      log.warning("Impossibile annullare worker precedente (potrebbe essere già stato eliminato).")
                       self.yt_search_worker = None # Resetta riferimento se l'oggetto non è valido
              else:
                  # Potrebbe esserci un worker non valido o non in esecuzione, resetta lo stato se necessario
@@ -1077,12 +1374,12 @@ class Jukebox(QWidget):
              # Se, nonostante il reset, is_searching fosse ancora True, esci.
              # O, più semplicemente, esci sempre se una ricerca era attiva per evitare sovrapposizioni.
              self.query_lbl.setText("Attendere fine ricerca precedente o riprovare...")
-             QTimer.singleShot(2000, lambda: self.query_lbl.setText("") if "Attendere" in self.query_lbl.text() else None)
+             self._clear_query_later(2000, "Attendere")
              return # Impedisce l'avvio di una nuova ricerca immediatamente
 
 
         # Hide virtual keyboard if it's open
-        if self.vkbd.isVisible():
+        if self.vkbd and self.vkbd.isVisible():
              # print("Jukebox.search_song: Chiamata a vkbd.hide_keyboard()") # Debug print
              self.vkbd.hide_keyboard()
 
@@ -1090,31 +1387,30 @@ class Jukebox(QWidget):
         download_requested = self.download_checkbox.isChecked()
 
         # --- Check Local Download Cache First (if it's a downloadable URL) ---
-        is_potential_download_url = YOUTUBE_REGEX.search(query) # Extend regex/checks for other sites if needed
+        video_id = extract_yt_id(query) # Extend regex/checks for other sites if needed
         # Verifica cache solo se è un URL potenzialmente scaricabile (non ricerca testuale)
         # e se il download non è richiesto (perché se è richiesto, vogliamo forzare il download/conversione)
         # O meglio: controlla la cache *sempre* se è un URL, indipendentemente da download_requested.
         # Se troviamo il file e download_requested=True, possiamo chiedere all'utente se vuole riscaricare?
         # Per ora, usiamo la cache se presente, ignorando download_requested se il file esiste già.
-        if is_potential_download_url:
-             video_id = is_potential_download_url.group(1)
-             expected_ext = '.mp3' if FFMPEG_PATH else None
+        if video_id:
+             expected_ext = '.mp3' if ffmpeg_path() else None
              extractor_prefix = 'youtube'
 
+             # Lookup nell'indice in memoria invece di uno stat per estensione
              cached_file_path = None
-             if expected_ext:
-                  potential_path = DOWNLOAD_DIR / f"{extractor_prefix}_{video_id}{expected_ext}"
-                  if potential_path.exists():
-                       cached_file_path = potential_path
-             else:
-                  for ext in AUDIO_EXTS:
-                       potential_path = DOWNLOAD_DIR / f"{extractor_prefix}_{video_id}{ext}"
-                       if potential_path.exists():
+             names = self._download_names()
+             for ext in ((expected_ext,) if expected_ext else AUDIO_EXTS):
+                  name = f"{extractor_prefix}_{video_id}{ext}"
+                  if name in names:
+                       potential_path = DOWNLOAD_DIR / name
+                       if potential_path.exists(): # File may have been removed outside the app
                             cached_file_path = potential_path
                             break
+                       names.discard(name)
 
              if cached_file_path:
-                 print(f"Trovato file audio locale nella cache per {query}: {cached_file_path.name}")
+                 log.debug("Trovato file audio locale nella cache per %s: %s", query, cached_file_path.name)
                  try:
                      # --- Logica per gestire la traccia dalla cache ---
                      cached_track = Track(
@@ -1125,47 +1421,46 @@ class Jukebox(QWidget):
                      info_json_path = cached_file_path.with_suffix(".info.json")
                      if info_json_path.exists():
                           try:
-                              with open(info_json_path, 'r', encoding='utf-8') as f: info_data = json.load(f)
+                              info_data = json_loads(info_json_path.read_bytes()) # orjson se disponibile
                               cached_track.title = info_data.get('title', cached_track.title)
                               thumbs = info_data.get('thumbnails', [])
                               cached_track.thumbnail_url = thumbs[-1].get('url') if thumbs else info_data.get('thumbnail')
                               cached_track.duration_sec = info_data.get('duration', cached_track.duration_sec)
-                              print(f"Caricate info addizionali da {info_json_path.name}")
-                          except Exception as e: print(f"Warning: Impossibile leggere info da {info_json_path.name}: {e}")
+                              log.debug("Caricate info addizionali da %s", info_json_path.name)
+                          except Exception as e: log.warning("Impossibile leggere info da %s: %s", info_json_path.name, e)
 
                      if cached_track.duration_sec <= 0:
-                          print(f"Avvio probe per durata di {cached_track.title}...")
-                          probe_worker = FileProbeWorker(cached_track.url)
-                          probe_worker.probe_done.connect(self.update_probe_duration_signal)
-                          probe_worker.finished.connect(probe_worker.deleteLater)
-                          self.probe_workers.append(probe_worker)
-                          probe_worker.start()
+                          log.debug("Avvio probe per durata di %s...", cached_track.title)
+                          self._start_probe([cached_track])
 
                      start_index_of_new_tracks = len(self.playlist)
                      self.add_tracks_to_playlist_signal.emit([cached_track])
 
                      is_player_playing = self.player and self.player.is_playing()
                      if not is_player_playing:
-                          print(f"Player non in riproduzione, avvio brano locale aggiunto ({cached_track.title})")
+                          log.debug("Player non in riproduzione, avvio brano locale aggiunto (%s)", cached_track.title)
                           self.play_track_signal.emit(start_index_of_new_tracks)
                           self.query_lbl.setText(f"Riproducendo da cache: {cached_track.title[:50]}...")
                      else:
-                          print(f"Player in riproduzione, brano locale aggiunto in coda.")
+                          log.debug("Player in riproduzione, brano locale aggiunto in coda.")
                           self.query_lbl.setText(f"Aggiunto da cache in coda: {cached_track.title[:50]}...")
 
                      self.search_in.clear()
                      return # Stop here, loaded from cache
                  except Exception as e:
-                      print(f"Errore processando traccia cache {cached_file_path.name}: {e}. Procedo con ricerca/download online.")
+                      log.error("Errore processando traccia cache %s: %s. Procedo con ricerca/download online.", cached_file_path.name, e)
         # --- End Check Local Download Cache ---
 
 
         # --- Start Online Search/Download Worker ---
-        print(f"Avvio worker per: '{query}', Download: {download_requested}")
+        log.debug("Avvio worker per: '%s', Download: %s", query, download_requested)
 
         # Imposta lo stato e mostra il caricamento PRIMA di creare il worker
         self.is_searching = True
         self._show_loading()
+        self._search_batch.clear()
+        self._search_start_index = len(self.playlist)
+        self._search_autoplayed = False
 
         # Assicurati che il riferimento al worker precedente sia None
         # Non dovrebbe essere necessario se _on_search_worker_finished funziona correttamente
@@ -1176,6 +1471,7 @@ class Jukebox(QWidget):
         self.yt_search_worker = YoutubeSearchWorker(query, num_results, download_audio=download_requested)
 
         # Connetti i segnali principali
+        self.yt_search_worker.track_ready.connect(self._queue_search_track)
         self.yt_search_worker.results_ready.connect(self._handle_search_results)
         self.yt_search_worker.error_occurred.connect(self._handle_search_error)
         self.yt_search_worker.progress_update.connect(self.query_lbl.setText) # Update status label
@@ -1191,11 +1487,11 @@ class Jukebox(QWidget):
         # Dentro la classe Jukebox in jukebox_gui.py
     def _show_playlist_context_menu(self, pos):
         """Mostra il menu contestuale per la playlist."""
-        item = self.queue.itemAt(pos)
-        if not item:
+        model_index = self.queue.indexAt(pos)
+        if not model_index.isValid():
             return # Click su spazio vuoto
 
-        index = self.queue.row(item)
+        index = model_index.row()
         if not (0 <= index < len(self.playlist)):
             return # Indice non valido (raro)
 
@@ -1204,9 +1500,8 @@ class Jukebox(QWidget):
         # Controlli di idoneità per il download
         can_download = (
             not track.is_local and
-            track.webpage_url and # Diamo priorità a webpage_url per YouTube etc.
-            ('youtube.com' in track.webpage_url or 'youtu.be' in track.webpage_url) and # Limita a YouTube per ora (o estendi)
-            FFMPEG_PATH is not None # FFmpeg deve essere disponibile
+            is_youtube_url(track.webpage_url) and # webpage_url, limitato a YouTube per ora (o estendi)
+            ffmpeg_path() is not None # FFmpeg deve essere disponibile
         )
 
         # Crea il menu
@@ -1241,13 +1536,13 @@ class Jukebox(QWidget):
         if track_to_download.is_local:
             self._info(f"'{track_to_download.title}' è già un file locale.")
             return
-        if not FFMPEG_PATH:
+        if not ffmpeg_path():
             self._error("Download MP3 non possibile: FFmpeg non trovato.")
             return
 
         # Usa webpage_url come URL da scaricare (più affidabile per yt-dlp)
         url_to_download = track_to_download.webpage_url
-        if not url_to_download or not ('youtube.com' in url_to_download or 'youtu.be' in url_to_download):
+        if not is_youtube_url(url_to_download):
             self._error(f"Impossibile scaricare: URL non valido o non supportato per '{track_to_download.title}'.")
             return
 
@@ -1262,7 +1557,7 @@ class Jukebox(QWidget):
         #     return
 
         # --- Avvia il worker di download ---
-        print(f"Avvio download contestuale per indice {index}: '{track_to_download.title}' da URL: {url_to_download}")
+        log.debug("Avvio download contestuale per indice %s: '%s' da URL: %s", index, track_to_download.title, url_to_download)
         self.is_searching = True # Imposta lo stato globale
         self._show_loading()
         self.query_lbl.setText(f"Avvio download MP3 per: {track_to_download.title[:40]}...")
@@ -1288,16 +1583,16 @@ class Jukebox(QWidget):
         sender_worker = self.sender()
         original_index = getattr(sender_worker, 'original_playlist_index', None)
 
-        print(f"Risultato download contestuale ricevuto per indice originale {original_index}.")
+        log.debug("Risultato download contestuale ricevuto per indice originale %s.", original_index)
 
         if original_index is None:
-            print("Errore: Indice originale mancante nel risultato del download contestuale.")
+            log.error("Errore: Indice originale mancante nel risultato del download contestuale.")
             # Potremmo provare ad aggiungerlo in coda come fallback?
             # self._handle_search_results(tracks) # Chiamata fallback all'handler generico
             return
 
         if not tracks or not isinstance(tracks, list) or len(tracks) != 1:
-            print(f"Errore: Risultato download contestuale non valido per indice {original_index} (ricevuto: {tracks}).")
+            log.error("Errore: Risultato download contestuale non valido per indice %s (ricevuto: %s).", original_index, tracks)
             self._error(f"Download fallito per la traccia selezionata (nessun file valido prodotto).")
             # Lo stato is_searching verrà resettato da _on_search_worker_finished
             return
@@ -1305,17 +1600,21 @@ class Jukebox(QWidget):
         local_track_data = tracks[0] # Dovrebbe essere il singolo Track scaricato
 
         if not local_track_data.is_local or not local_track_data.url:
-            print(f"Errore: Il worker non ha restituito una traccia locale valida per indice {original_index}.")
+            log.error("Errore: Il worker non ha restituito una traccia locale valida per indice %s.", original_index)
             self._error(f"Download fallito per la traccia selezionata (file locale non trovato nel risultato).")
             return
 
+        self._index_downloads([local_track_data])
+
         # --- Aggiorna la traccia esistente nella playlist ---
         if 0 <= original_index < len(self.playlist):
-            print(f"Aggiornamento traccia all'indice {original_index} con dati locali.")
+            log.debug("Aggiornamento traccia all'indice %s con dati locali.", original_index)
             original_track = self.playlist[original_index]
             # Aggiorna solo i campi rilevanti (URL, is_local, magari durata se disponibile)
             original_track.url = local_track_data.url
             original_track.is_local = True
+            # identifier è precalcolato (webpage_url or url): va ricalcolato se è cambiato l'url
+            original_track.identifier = original_track.webpage_url or original_track.url
             if local_track_data.duration_sec and local_track_data.duration_sec > 0:
                 original_track.duration_sec = local_track_data.duration_sec
             # Potremmo anche aggiornare titolo/thumbnail se quelli scaricati sono migliori?
@@ -1326,7 +1625,7 @@ class Jukebox(QWidget):
             self._refresh_lists()
             save_json("playlist.json", self.playlist)
             self.query_lbl.setText(f"Scaricato: {original_track.title[:50]}...")
-            QTimer.singleShot(3000, lambda: self.query_lbl.setText("") if "Scaricato:" in self.query_lbl.text() else None)
+            self._clear_query_later(3000, "Scaricato:")
 
             # Se la traccia scaricata era quella corrente, ricarica le info
             if self.current_idx == original_index:
@@ -1336,15 +1635,11 @@ class Jukebox(QWidget):
 
             # Avvia probe se necessario (dovrebbe essere già stato fatto dal worker?)
             if original_track.duration_sec <= 0:
-                 print(f"Avvio probe post-download per {original_track.title}...")
-                 probe_worker = FileProbeWorker(original_track.url)
-                 probe_worker.probe_done.connect(self.update_probe_duration_signal)
-                 probe_worker.finished.connect(probe_worker.deleteLater)
-                 self.probe_workers.append(probe_worker)
-                 probe_worker.start()
+                 log.debug("Avvio probe post-download per %s...", original_track.title)
+                 self._start_probe([original_track])
 
         else:
-            print(f"Errore: Indice originale {original_index} non più valido nella playlist dopo il download.")
+            log.error("Errore: Indice originale %s non più valido nella playlist dopo il download.", original_index)
             self._error("Errore interno durante l'aggiornamento della playlist dopo il download.")
             # Aggiungi comunque la traccia scaricata in coda come fallback?
             # self.add_tracks_to_playlist_signal.emit([local_track_data])
@@ -1357,7 +1652,7 @@ class Jukebox(QWidget):
         if original_index is not None and 0 <= original_index < len(self.playlist):
              track_title = self.playlist[original_index].title
 
-        print(f"Errore durante il download contestuale per indice {original_index} ('{track_title}'): {msg}")
+        log.error("Errore durante il download contestuale per indice %s ('%s'): %s", original_index, track_title, msg)
         self._error(f"Errore durante il download di '{track_title[:40]}...':\n{msg}")
         self.query_lbl.setText(f"Errore download: {track_title[:40]}...")
         # Lo stato is_searching verrà resettato da _on_search_worker_finished
@@ -1366,23 +1661,23 @@ class Jukebox(QWidget):
     def _remove_track_from_playlist(self, index):
         """Rimuove una traccia dalla playlist all'indice specificato."""
         if not (0 <= index < len(self.playlist)):
-            print(f"Tentativo di rimuovere indice non valido: {index}")
+            log.debug("Tentativo di rimuovere indice non valido: %s", index)
             return
 
         removed_track = self.playlist.pop(index)
-        print(f"Rimosso dalla playlist: '{removed_track.title}' (indice {index})")
+        log.debug("Rimosso dalla playlist: '%s' (indice %s)", removed_track.title, index)
 
         # Gestione se la traccia rimossa era quella corrente
         if index == self.current_idx:
-            print("La traccia corrente è stata rimossa.")
+            log.debug("La traccia corrente è stata rimossa.")
             if self.player: self.player.stop()
             self._clear_media_info()
             # Decide cosa fare: suonare la successiva o fermarsi?
             if index < len(self.playlist): # Se c'è una traccia successiva nello stesso indice
-                print("Avvio traccia successiva...")
+                log.debug("Avvio traccia successiva...")
                 self.play_track_signal.emit(index)
             elif self.playlist: # Se ci sono altre tracce, suona la precedente (o la nuova ultima)
-                print("Avvio traccia precedente/ultima...")
+                log.debug("Avvio traccia precedente/ultima...")
                 new_index = max(0, index - 1) if self.playlist else -1
                 if new_index != -1:
                     self.play_track_signal.emit(new_index)
@@ -1395,11 +1690,54 @@ class Jukebox(QWidget):
             # Se abbiamo rimosso una traccia *prima* di quella corrente,
             # l'indice corrente deve essere decrementato.
             self.current_idx -= 1
-            print(f"Indice corrente aggiornato a: {self.current_idx}")
+            log.debug("Indice corrente aggiornato a: %s", self.current_idx)
 
         # Aggiorna UI e salva
         self._refresh_lists()
         save_json("playlist.json", self.playlist)
+    def _download_names(self):
+        """Returns the set of file names in DOWNLOAD_DIR, scanned once and then kept up to date."""
+        if self._download_index is None:
+            try:
+                with os.scandir(DOWNLOAD_DIR) as entries:
+                    self._download_index = {entry.name for entry in entries if entry.is_file()}
+            except OSError as e:
+                log.warning("Impossibile leggere %s: %s", DOWNLOAD_DIR, e)
+                self._download_index = set()
+        return self._download_index
+
+    def _index_downloads(self, tracks):
+        """Adds the files of freshly downloaded tracks to the download index (if already built)."""
+        if self._download_index is None:
+            return # Not scanned yet: the first scan will see them
+        for track in tracks:
+            if track.is_local and track.url:
+                path = Path(track.url)
+                if path.parent == DOWNLOAD_DIR:
+                    self._download_index.add(path.name)
+
+    def _queue_search_track(self, track):
+        """Collects a track streamed by the YoutubeSearchWorker; inserted with the next batch."""
+        self._search_batch.append(track)
+        if not self._search_batch_timer.isActive():
+            self._search_batch_timer.start()
+
+    def _flush_search_batch(self):
+        """Adds the pending search tracks to the playlist in one go (one save and one list refresh)."""
+        self._search_batch_timer.stop()
+        if not self._search_batch: return
+        batch, self._search_batch = self._search_batch, []
+        first_new_index = len(self.playlist)
+        self.add_tracks_to_playlist_signal.emit(batch)
+
+        # Avvia la riproduzione solo con il primo blocco della ricerca, se il player è fermo
+        if (not self._search_autoplayed and first_new_index == self._search_start_index
+                and len(self.playlist) > first_new_index
+                and not (self.player and self.player.is_playing())):
+            self._search_autoplayed = True
+            log.debug("Player non in riproduzione, avvio primo risultato aggiunto all'indice: %s", first_new_index)
+            self.play_track_signal.emit(first_new_index)
+
     def _handle_search_results(self, tracks):
         """Handles search/download results received from the YoutubeSearchWorker."""
         sender_worker = self.sender() # Identifica quale worker ha inviato il segnale
@@ -1412,10 +1750,13 @@ class Jukebox(QWidget):
         #     print(f"Ignoring results from potentially outdated worker {id(sender_worker)}.")
         #     return
 
-        print(f"Ricevuti {len(tracks)} risultati dal worker {id(sender_worker)}.")
+        log.debug("Ricevuti %s risultati dal worker %s.", len(tracks), id(sender_worker))
 
         # Verifica se la ricerca è stata annullata o non ha prodotto risultati validi
         if not tracks:
+            # Ricerca annullata: scarta le tracce ricevute ma non ancora inserite
+            self._search_batch_timer.stop()
+            self._search_batch.clear()
             # Controlla lo stato attuale dell'interfaccia per evitare messaggi fuorvianti
             current_status = self.query_lbl.text()
             # Mostra info solo se non c'è un messaggio di errore o un nuovo stato di caricamento
@@ -1426,22 +1767,17 @@ class Jukebox(QWidget):
                      self.query_lbl.setText("") # Clear status only if it was informational
             return
 
-        # Aggiungi le tracce valide alla playlist
-        start_index_of_new_tracks = len(self.playlist)
-        self.add_tracks_to_playlist_signal.emit(tracks) # Usa il segnale per l'aggiunta
+        self._index_downloads(tracks) # Downloaded MP3s are found by the next cache lookup
+
+        # Le tracce sono già arrivate una alla volta con track_ready: inserisci quelle ancora in attesa
+        start_index_of_new_tracks = self._search_start_index
+        self._flush_search_batch()
 
         # Verifica se sono state effettivamente aggiunte tracce
         tracks_were_added = len(self.playlist) > start_index_of_new_tracks
 
-        # Decide se avviare la riproduzione automatica
-        # Controlla lo stato del player *prima* di emettere il segnale play_track
-        is_player_playing = self.player and self.player.is_playing()
-
-        if not is_player_playing and tracks_were_added:
+        if self._search_autoplayed and tracks_were_added:
              actual_play_index = start_index_of_new_tracks # L'indice della prima traccia aggiunta
-             print(f"Player non in riproduzione, avvio primo risultato aggiunto all'indice: {actual_play_index}")
-             # Emetti il segnale per avviare la riproduzione
-             self.play_track_signal.emit(actual_play_index)
              # Aggiorna l'etichetta di stato
              first_track_title = self.playlist[actual_play_index].title[:50] # Usa il titolo dalla playlist
              status_msg = f"Riproducendo: {first_track_title}..."
@@ -1452,7 +1788,7 @@ class Jukebox(QWidget):
         elif tracks_were_added:
              # Player già in riproduzione O nessuna traccia aggiunta (caso gestito sopra)
              added_count = len(self.playlist) - start_index_of_new_tracks
-             print(f"Player in riproduzione, aggiunti {added_count} brani in coda.")
+             log.debug("Player in riproduzione, aggiunti %s brani in coda.", added_count)
              status_msg = f"Aggiunti {added_count} brani in coda."
              # Controlla se almeno uno dei brani *appena aggiunti* è locale
              newly_added_tracks = self.playlist[start_index_of_new_tracks:]
@@ -1480,7 +1816,7 @@ class Jukebox(QWidget):
         #     return
 
         # Stampa l'errore nel terminale per il debug, includendo l'ID del worker
-        print(f"Errore ricevuto dal worker {id(sender_worker)}: {msg}")
+        log.error("Errore ricevuto dal worker %s: %s", id(sender_worker), msg)
 
         # Mostra il messaggio di errore all'utente tramite una QMessageBox
         self._error(msg)
@@ -1498,19 +1834,19 @@ class Jukebox(QWidget):
         """Slot chiamato quando CoverDownloadWorker emette il segnale finished."""
         sender_worker = self.sender()
         if sender_worker:
-            print(f"Jukebox: _on_cover_worker_finished chiamato per worker {id(sender_worker)}.")
+            log.debug("Jukebox: _on_cover_worker_finished chiamato per worker %s.", id(sender_worker))
             # Programma la cancellazione per il worker che ha finito
             sender_worker.deleteLater()
             # Se self.cover_worker punta ancora a questo worker finito,
             # resetta il riferimento nella classe Jukebox.
             if self.cover_worker is sender_worker:
-                print("Jukebox: Resettato riferimento self.cover_worker.")
+                log.debug("Jukebox: Resettato riferimento self.cover_worker.")
                 self.cover_worker = None
         else:
-             print("Jukebox: _on_cover_worker_finished - sender (worker) non trovato.")
+             log.debug("Jukebox: _on_cover_worker_finished - sender (worker) non trovato.")
     def _on_search_worker_finished(self):
         """Slot chiamato quando YoutubeSearchWorker emette il segnale finished."""
-        print("Jukebox: _on_search_worker_finished chiamato.")
+        log.debug("Jukebox: _on_search_worker_finished chiamato.")
         self.is_searching = False # Resetta lo stato di ricerca
         self._hide_loading() # Nascondi l'indicatore di caricamento
 
@@ -1521,15 +1857,15 @@ class Jukebox(QWidget):
             # fa riferimento self.yt_search_worker (potrebbe essere stato
             # sovrascritto da una ricerca rapidissima successiva).
             # Tuttavia, dovremmo comunque cancellare il worker che ha *emesso* il segnale.
-            print(f"Jukebox: Scheduling deletion for worker {id(sender_worker)} che ha finito.")
+            log.debug("Jukebox: Scheduling deletion for worker %s che ha finito.", id(sender_worker))
             sender_worker.deleteLater()
 
             # Se il riferimento principale punta ancora a questo worker, resettalo.
             if self.yt_search_worker is sender_worker:
                  self.yt_search_worker = None
-                 print("Jukebox: Riferimento self.yt_search_worker resettato.")
+                 log.debug("Jukebox: Riferimento self.yt_search_worker resettato.")
         else:
-            print("Jukebox: _on_search_worker_finished - sender (worker) non trovato.")
+            log.debug("Jukebox: _on_search_worker_finished - sender (worker) non trovato.")
 
         # Aggiorna l'etichetta di stato se mostra ancora un messaggio di caricamento/attesa
         current_status = self.query_lbl.text()
@@ -1539,7 +1875,7 @@ class Jukebox(QWidget):
                  self.query_lbl.setText("")
     def _import_files(self):
         """Opens a file dialog to import local audio files."""
-        if self.vkbd.isVisible():
+        if self.vkbd and self.vkbd.isVisible():
              self.vkbd.hide_keyboard()
 
         # Define supported extensions string for the dialog filter
@@ -1557,16 +1893,11 @@ class Jukebox(QWidget):
             return
 
         # --- Cancel previous probe workers (optional but good practice) ---
-        active_probes = False
-        for worker in self.probe_workers:
-             if worker and worker.isRunning():
-                  print(f"Annullamento probe precedente per: {worker.path}")
-                  worker.cancel() # Signal cancellation
-                  active_probes = True
-        if active_probes:
-             print("Attendendo brevemente la terminazione dei probe precedenti...")
-             # time.sleep(0.1) # Brief pause (optional)
-        self.probe_workers.clear() # Clear the list of workers
+        for task in self._probe_tasks:
+             log.debug("Annullamento probe precedente per %s file", len(task.paths))
+             task.cancel() # Signal cancellation (a cancelled task does not report back)
+        self._probe_tasks.clear()
+        self._probe_targets.clear() # Cancelled probes won't report back
 
         # --- Process selected files ---
         imported_tracks = []
@@ -1583,9 +1914,9 @@ class Jukebox(QWidget):
                       imported_tracks.append(track)
                       needs_probe.append(track) # Add to list for duration probing
                  else:
-                      print(f"File ignorato (non valido o estensione non supportata): {p_str}")
+                      log.debug("File ignorato (non valido o estensione non supportata): %s", p_str)
              except Exception as e:
-                  print(f"Errore processando il file {p_str}: {e}")
+                  log.error("Errore processando il file %s: %s", p_str, e)
 
         if not imported_tracks:
              self._info("Nessun file audio valido selezionato o processato.")
@@ -1597,14 +1928,9 @@ class Jukebox(QWidget):
 
         # --- Start background duration probing ---
         if needs_probe:
-             print(f"Avvio probe per la durata di {len(needs_probe)} file importati...")
+             log.debug("Avvio probe per la durata di %s file importati...", len(needs_probe))
              self.query_lbl.setText(f"Analisi durata {len(needs_probe)} file...")
-             for track_to_probe in needs_probe:
-                 probe_worker = FileProbeWorker(track_to_probe.url) # Pass the path
-                 probe_worker.probe_done.connect(self.update_probe_duration_signal)
-                 probe_worker.finished.connect(probe_worker.deleteLater)
-                 self.probe_workers.append(probe_worker) # Keep track
-                 probe_worker.start()
+             self._start_probe(needs_probe) # One worker for the whole batch
         else:
              self.query_lbl.setText(f"Importati {len(imported_tracks)} file.")
 
@@ -1612,31 +1938,34 @@ class Jukebox(QWidget):
         # Auto-play the first imported track if the player was idle
         is_player_playing = self.player and self.player.is_playing()
         if not is_player_playing and len(self.playlist) > start_index_of_imported:
-            print(f"Player non in riproduzione, avvio primo brano importato all'indice: {start_index_of_imported}")
+            log.debug("Player non in riproduzione, avvio primo brano importato all'indice: %s", start_index_of_imported)
             self.play_track_signal.emit(start_index_of_imported)
 
 
-    def _handle_probe_done(self, path, duration_ms):
-        """Updates the duration of a track after FileProbeWorker finishes."""
-        duration_sec = duration_ms // 1000 if duration_ms is not None and duration_ms > 0 else 0
-        print(f"Probe completato per {Path(path).name}: {duration_sec}s")
+    def _start_probe(self, tracks):
+        """Starts a single FileProbeTask to read the durations of the given local tracks."""
+        for track in tracks:
+            self._probe_targets.setdefault(track.url, []).append(track)
+        task = FileProbeTask([track.url for track in tracks]) # Pass the paths
+        task.signals.probe_done.connect(self.update_probe_duration_signal)
+        self._probe_tasks.add(task) # Kept only until it reports back (or is cancelled)
+        QThreadPool.globalInstance().start(task)
 
-        updated = False
-        track_index = -1
-        # Find the track in the playlist by its path (URL)
-        for i, track in enumerate(self.playlist):
-            # Compare resolved paths for robustness
-            try:
-                 if track.is_local and Path(track.url).resolve() == Path(path).resolve():
-                      if track.duration_sec != duration_sec:
-                          track.duration_sec = duration_sec
-                          updated = True
-                          track_index = i
-                          print(f"Durata aggiornata per: {track.title}")
-                      break # Found the track
-            except Exception as e:
-                 print(f"Errore comparando path durante probe update: {e}")
+    def _handle_probe_done(self, task, durations):
+        """Updates the durations of the tracks of a batch after FileProbeTask finishes."""
+        log.debug("Probe completato per %s file", len(durations))
 
+        # Tracks waiting for each path were recorded by _start_probe: no playlist scan needed
+        updated = False
+        current_updated = False
+        for path, duration_ms in durations.items():
+            duration_sec = duration_ms // 1000 if duration_ms is not None and duration_ms > 0 else 0
+            for track in self._probe_targets.pop(path, ()):
+                 if track.duration_sec != duration_sec:
+                      track.duration_sec = duration_sec
+                      updated = True
+                      current_updated = current_updated or track is self.current_track_info
+                      log.debug("Durata aggiornata per: %s (%ss)", track.title, duration_sec)
 
         if updated:
             # Refresh UI list if duration changed
@@ -1645,18 +1974,18 @@ class Jukebox(QWidget):
             # save_json("playlist.json", self.playlist)
 
             # If the currently playing track's duration was updated, refresh the info label/slider max
-            if track_index == self.current_idx:
-                 self._update_info_label(self.playlist[track_index])
+            if current_updated:
+                 self._update_info_label(self.current_track_info)
 
-        # Remove worker reference (optional, as it deletes itself)
-        self.probe_workers = [w for w in self.probe_workers if w.path != path and w.isRunning()]
+        # Drop exactly the task that reported (it is the only reference keeping it alive)
+        self._probe_tasks.discard(task)
 
         # Check if all probes are done
-        if not any(w.isRunning() for w in self.probe_workers):
+        if not self._probe_tasks:
              if "Analisi durata" in self.query_lbl.text():
                   self.query_lbl.setText("Analisi durata completata.")
                   # Clear message after a delay
-                  QTimer.singleShot(2000, lambda: self.query_lbl.setText("") if "Analisi durata completata" in self.query_lbl.text() else None)
+                  self._clear_query_later(2000, "Analisi durata completata")
 
 
     # --- Playback Logic ---
@@ -1664,7 +1993,7 @@ class Jukebox(QWidget):
         """Starts or resumes playback of the track at the given playlist index."""
         # --- Validate Index ---
         if not (0 <= index < len(self.playlist)):
-            print(f"Errore: Tentativo di riprodurre indice non valido: {index}. Playlist size: {len(self.playlist)}")
+            log.error("Errore: Tentativo di riprodurre indice non valido: %s. Playlist size: %s", index, len(self.playlist))
             self.player.stop() # Stop playback if index is invalid
             self.current_idx = -1
             self._clear_media_info()
@@ -1673,11 +2002,14 @@ class Jukebox(QWidget):
 
         # --- Get Track and Check for Resume ---
         track_to_play = self.playlist[index]
-        print(f"Richiesta riproduzione indice {index}: '{track_to_play.title}' ({'Locale' if track_to_play.is_local else 'Stream'})")
+        log.debug("Richiesta riproduzione indice %s: '%s' (%s)", index, track_to_play.title, 'Locale' if track_to_play.is_local else 'Stream')
+
+        # Read the player state once (each call crosses into libvlc)
+        state = self.player.get_state() if self.player else None
 
         # If clicking the *same* track which is currently *paused*, just resume.
-        if index == self.current_idx and self.player and self.player.get_state() == vlc.State.Paused:
-             print("Ripresa riproduzione.")
+        if index == self.current_idx and state == vlc.State.Paused:
+             log.debug("Ripresa riproduzione.")
              self.player.play()
              # No need to set media again, just update UI state
              self.is_playing = True
@@ -1687,8 +2019,8 @@ class Jukebox(QWidget):
 
         # --- Stop Previous Playback (if any) ---
         # Necessary before setting new media, especially for streams
-        if self.player.is_playing() or self.player.get_state() == vlc.State.Paused:
-            print("Stop player precedente...")
+        if state in (vlc.State.Playing, vlc.State.Buffering, vlc.State.Paused):
+            log.debug("Stop player precedente...")
             self.player.stop()
             # Short pause might help VLC release resources before new media
             # time.sleep(0.05) # Usually not necessary with stop()
@@ -1700,7 +2032,7 @@ class Jukebox(QWidget):
         media_source = track_to_play.url
         if not media_source: # Sanity check: Track must have a URL/path
              error_msg = f"URL/Percorso non valido per '{track_to_play.title}'. Impossibile riprodurre."
-             print(f"FATAL: {error_msg}")
+             log.error(error_msg)
              self.playback_error_signal.emit(error_msg) # Signal error
              return # Cannot proceed
 
@@ -1715,10 +2047,10 @@ class Jukebox(QWidget):
                       raise FileNotFoundError(f"File locale non trovato: {media_source}")
                  # Use media_new_path for local files (often more reliable)
                  media = vlc_instance.media_new_path(str(source_path))
-                 print(f"Creazione media locale da: {source_path}")
+                 log.debug("Creazione media locale da: %s", source_path)
             else:
                  # Stream playback (YouTube, SoundCloud, etc.)
-                 if not str(media_source).lower().startswith(('http', 'rtsp', 'rtmp')):
+                 if str(media_source)[:4].lower() not in _NET_PREFIXES: # No lowercased copy of the whole URL
                      # Basic check for valid streaming protocols
                      raise ValueError(f"Formato URL non supportato per lo streaming: {media_source}")
 
@@ -1730,7 +2062,7 @@ class Jukebox(QWidget):
                      # ':file-caching=1000' # File cache (less relevant for streams)
                  ]
                  media = vlc_instance.media_new(media_source, *options)
-                 print(f"Creazione media stream da: {media_source} con opzioni: {options}")
+                 log.debug("Creazione media stream da: %s con opzioni: %s", media_source, options)
 
             if media is None:
                  raise ValueError(f"Impossibile creare oggetto media VLC da: {media_source}")
@@ -1744,13 +2076,13 @@ class Jukebox(QWidget):
             # Set initial volume (might be redundant if volume unchanged, but safe)
             self._set_volume(self.vol.value())
 
-            print("Avvio riproduzione...")
+            log.debug("Avvio riproduzione...")
             if self.player.play() == -1:
                  # Playback failed to start
                  raise RuntimeError("Errore VLC: player.play() ha restituito -1. Impossibile avviare la riproduzione.")
 
             # --- Update UI ---
-            print("Riproduzione avviata con successo.")
+            log.debug("Riproduzione avviata con successo.")
             self._update_info_label(track_to_play) # Show title/duration
             self._set_cover(track_to_play.thumbnail_url) # Load cover art
             self._refresh_lists() # Update list highlighting
@@ -1762,16 +2094,15 @@ class Jukebox(QWidget):
         # --- Error Handling ---
         except FileNotFoundError as e:
              error_msg = f"Errore: File non trovato '{track_to_play.title}'. Potrebbe essere stato spostato o cancellato.\n({e})"
-             print(error_msg)
+             log.error(error_msg)
              self.playback_error_signal.emit(error_msg) # Signal error
         except ValueError as e: # Catches invalid URL format etc.
              error_msg = f"Errore: Sorgente media non valida per '{track_to_play.title}'.\n({e})"
-             print(error_msg)
+             log.error(error_msg)
              self.playback_error_signal.emit(error_msg) # Signal error
         except Exception as e: # Catch-all for other VLC or unexpected errors
-             import traceback
              error_msg = f"Errore imprevisto durante l'avvio della riproduzione per '{track_to_play.title}'.\n({e})"
-             print(f"{error_msg}\n{traceback.format_exc()}")
+             log.exception(error_msg)
              self.playback_error_signal.emit(error_msg) # Signal error
 
 
@@ -1792,7 +2123,7 @@ class Jukebox(QWidget):
              self.progress.setEnabled(duration_sec > 0) # Enable slider only if duration known
              # Reset progress value and time label for the new track
              self.progress.setValue(0)
-             self.time_lbl.setText(f"00:00 / {dur_str}")
+             self._set_time_text(f"00:00 / {dur_str}")
         else:
              # No track provided, clear the info
              self._clear_media_info()
@@ -1805,7 +2136,7 @@ class Jukebox(QWidget):
          if self.progress.value() != 0: self.progress.setValue(0)
          if self.progress.maximum() != 0: self.progress.setMaximum(0)
          self.progress.setEnabled(False)
-         self.time_lbl.setText("00:00 / 00:00")
+         self._set_time_text("00:00 / 00:00")
          # Clear current track reference
          self.current_track_info = None
          # Optionally clear status label
@@ -1820,20 +2151,20 @@ class Jukebox(QWidget):
 
         if state == vlc.State.Playing:
             self.player.pause()
-            print("Player Paused.")
+            log.debug("Player Paused.")
         elif state == vlc.State.Paused:
             self.player.play()
-            print("Player Resumed.")
+            log.debug("Player Resumed.")
         elif state in (vlc.State.Stopped, vlc.State.Ended, vlc.State.Error, vlc.State.NothingSpecial):
              # If stopped/ended, try to play the current track again, or the first track
              if 0 <= self.current_idx < len(self.playlist):
-                 print(f"Player stopped/ended. Replaying track index {self.current_idx}.")
+                 log.debug("Player stopped/ended. Replaying track index %s.", self.current_idx)
                  self.play_track_signal.emit(self.current_idx) # Use signal
              elif self.playlist: # If playlist not empty, play first track
-                 print("Player stopped/ended. Playing first track.")
+                 log.debug("Player stopped/ended. Playing first track.")
                  self.play_track_signal.emit(0) # Use signal
              else:
-                 print("Player stopped/ended. Playlist empty.")
+                 log.debug("Player stopped/ended. Playlist empty.")
                  self._clear_media_info() # Clear display if nothing to play
                  # Ensure button shows "Play"
                  self.is_playing = False
@@ -1852,7 +2183,7 @@ class Jukebox(QWidget):
     def play_next(self):
         """Plays the next track in the playlist."""
         if not self.playlist: # No tracks, do nothing
-            print("Play Next: Playlist vuota.")
+            log.debug("Play Next: Playlist vuota.")
             return
 
         current = self.current_idx
@@ -1865,7 +2196,7 @@ class Jukebox(QWidget):
 
         if next_idx >= total_tracks:
             # Reached end of playlist
-            print("Fine della playlist.")
+            log.debug("Fine della playlist.")
             # Option 1: Stop playback
             self.player.stop()
             self.current_idx = -1
@@ -1883,17 +2214,17 @@ class Jukebox(QWidget):
     def play_previous(self):
         """Plays the previous track in the playlist."""
         if not self.playlist: # No tracks, do nothing
-            print("Play Previous: Playlist vuota.")
+            log.debug("Play Previous: Playlist vuota.")
             return
 
         current = self.current_idx
         total_tracks = len(self.playlist)
 
         if current <= 0: # Already at the first track or nothing playing
-            print("Inizio della playlist.")
+            log.debug("Inizio della playlist.")
             # Option 1: Do nothing or restart the first track
             if total_tracks > 0:
-                 print("Riavvio prima traccia.")
+                 log.debug("Riavvio prima traccia.")
                  self.play_track_signal.emit(0) # Restart first track
             # Option 2: Loop to the last track (uncomment to enable loop)
             # print("Looping all'ultima traccia.")
@@ -1910,63 +2241,57 @@ class Jukebox(QWidget):
         """Adds a list of Track objects to the internal playlist."""
         if not tracks: return
 
-        added_count = 0
+        valid_tracks = []
         # Optional: Prevent duplicates based on URL/webpage_url?
         # existing_ids = {t.webpage_url or t.url for t in self.playlist}
         for track in tracks:
              if isinstance(track, Track) and (track.url or track.webpage_url):
                  # if (track.webpage_url or track.url) not in existing_ids:
-                 self.playlist.append(track)
-                 added_count += 1
+                 valid_tracks.append(track)
                  # else:
                  #    print(f"Skipping duplicate track: {track.title}")
              else:
-                 print(f"Avviso: Tentativo di aggiungere oggetto non valido alla playlist: {track}")
+                 log.warning("Tentativo di aggiungere oggetto non valido alla playlist: %s", track)
 
+        added_count = len(valid_tracks)
         if added_count > 0:
-            print(f"Aggiunti {added_count} brani alla playlist.")
+            # One beginInsertRows/endInsertRows for the whole batch: the view lays out only the new rows
+            self._queue_model.append_tracks(valid_tracks)
+            log.debug("Aggiunti %s brani alla playlist.", added_count)
             save_json("playlist.json", self.playlist) # Save updated playlist
-            self._refresh_lists() # Update UI
         else:
-             print("Nessun brano valido da aggiungere alla playlist.")
+             log.debug("Nessun brano valido da aggiungere alla playlist.")
 
 
-    def _queue_double_clicked(self, item):
-        """Handles double-click on a playlist item to play it."""
-        clicked_idx = self.queue.row(item)
+    def _queue_double_clicked(self, index):
+        """Handles double-click on a playlist row to play it."""
+        clicked_idx = index.row()
         if 0 <= clicked_idx < len(self.playlist):
             self.play_track_signal.emit(clicked_idx) # Signal to play this index
         else:
-             print(f"Warning: Double click su indice playlist non valido: {clicked_idx}")
+             log.warning("Double click su indice playlist non valido: %s", clicked_idx)
 
 
     def _add_to_history(self, track):
         """Adds a played track to the history list (avoiding duplicates)."""
         if not isinstance(track, Track):
-             print(f"Avviso: _add_to_history chiamato con oggetto non Track: {track}")
+             log.warning("_add_to_history chiamato con oggetto non Track: %s", track)
              return
 
         # Use webpage_url as primary identifier (e.g., YouTube page URL)
         # Fallback to the stream/file URL if webpage_url is missing
         identifier_to_add = track.webpage_url or track.url
         if not identifier_to_add:
-             print(f"Avviso: Impossibile aggiungere '{track.title}' alla cronologia (nessun identificatore).")
+             log.warning("Impossibile aggiungere '%s' alla cronologia (nessun identificatore).", track.title)
              return # Cannot add if no identifier
 
         # --- Remove existing entry with the same identifier ---
-        # Iterate backwards to safely remove while iterating
-        # Or create a new list excluding the item
-        new_history = []
-        found = False
-        for h_track in self.history:
-             h_identifier = h_track.webpage_url or h_track.url
-             if h_identifier == identifier_to_add:
-                  # Don't add this one to the new list (effectively removing it)
-                  found = True
-                  print(f"Rimuovendo vecchia entry '{h_track.title}' dalla cronologia.")
-             else:
-                  new_history.append(h_track)
-        self.history = new_history
+        # Identifiers are unique in the history, so stop at the first match and delete in place
+        for i, h_track in enumerate(self.history):
+             if h_track.identifier == identifier_to_add:
+                  log.debug("Rimuovendo vecchia entry '%s' dalla cronologia.", h_track.title)
+                  del self.history[i]
+                  break
 
         # --- Add the new entry to the beginning ---
         # Create a clean copy of the track for history
@@ -1977,34 +2302,33 @@ class Jukebox(QWidget):
         self.history.insert(0, history_track)
 
         # --- Limit History Size ---
-        if len(self.history) > MAX_HISTORY_SIZE:
-            self.history = self.history[:MAX_HISTORY_SIZE] # Keep only the most recent items
+        del self.history[MAX_HISTORY_SIZE:] # Keep only the most recent items (in place)
 
         # --- Save and Refresh ---
+        self._history_version += 1
         save_json("history.json", self.history)
         self._refresh_lists() # Update history list display
-        print(f"Aggiunto '{history_track.title}' alla cronologia.")
+        log.debug("Aggiunto '%s' alla cronologia.", history_track.title)
 
 
-    def _history_double_clicked(self, item):
-        """Handles double-click on a history item to add it to the playlist queue."""
-        # Retrieve the identifier stored in the item's data
-        track_identifier = item.data(Qt.UserRole)
+    def _history_double_clicked(self, index):
+        """Handles double-click on a history row to add it to the playlist queue."""
+        # Retrieve the identifier exposed by the model
+        track_identifier = index.data(Qt.UserRole)
         if not track_identifier:
-             print("Warning: Identificatore non trovato nell'elemento della cronologia.")
+             log.warning("Identificatore non trovato nell'elemento della cronologia.")
              self._error("Dati brano cronologia corrotti o mancanti.")
              return
 
         # Find the corresponding Track object in the self.history list
         track_to_add = None
         for h_track in self.history:
-             h_identifier = h_track.webpage_url or h_track.url
-             if h_identifier == track_identifier:
+             if h_track.identifier == track_identifier:
                   track_to_add = h_track
                   break
 
         if not track_to_add:
-             print(f"Warning: Traccia non trovata nei dati della cronologia per l'identificatore: {track_identifier}")
+             log.warning("Traccia non trovata nei dati della cronologia per l'identificatore: %s", track_identifier)
              self._error("Brano della cronologia non trovato nei dati salvati.")
              # Optionally refresh list in case of discrepancy: self._refresh_lists()
              return
@@ -2028,74 +2352,32 @@ class Jukebox(QWidget):
         new_index = len(self.playlist) - 1 # Index of the newly added track
 
         if not is_player_playing:
-             print(f"Player non in riproduzione, avvio brano aggiunto dalla cronologia ({new_track.title})")
+             log.debug("Player non in riproduzione, avvio brano aggiunto dalla cronologia (%s)", new_track.title)
              self.play_track_signal.emit(new_index) # Play the added track
              self.query_lbl.setText(f"Riproducendo da Cronologia: {new_track.title[:50]}...")
         else:
-             print(f"Player in riproduzione, brano aggiunto dalla cronologia in coda.")
+             log.debug("Player in riproduzione, brano aggiunto dalla cronologia in coda.")
              self.query_lbl.setText(f"Aggiunto da Cronologia in coda: {new_track.title[:50]}...")
 
 
     def _refresh_lists(self):
-        """Updates both the playlist (queue) and history list widgets."""
+        """Updates both the playlist (queue) and history list views."""
         # --- Refresh Playlist (Queue) ---
-        current_playlist_index = self.current_idx # Store current index before clearing
-        self.queue.clear() # Remove all items
-        for i, track in enumerate(self.playlist):
-            # Format duration string
-            duration_str = ""
-            if track.duration_sec is not None and track.duration_sec > 0:
-                 duration_str = f" ({self._fmt_time(track.duration_sec * 1000)})"
-            # Format title with local indicator if needed
-            prefix = "[L] " if track.is_local else ""
-            item_text = f"{prefix}{track.title}{duration_str}"
-
-            item = QListWidgetItem(item_text)
-            # Set tooltip with more info (e.g., full title or URL)
-            tooltip_text = f"Titolo: {track.title}\n"
-            tooltip_text += f"URL/Path: {track.url}\n"
-            if track.webpage_url and track.webpage_url != track.url:
-                 tooltip_text += f"Pagina Web: {track.webpage_url}\n"
-            tooltip_text += f"Locale: {'Sì' if track.is_local else 'No'}"
-            item.setToolTip(tooltip_text)
-
-            # Highlight the currently playing/selected item
-            if i == current_playlist_index:
-                # Use selection colors defined in stylesheet
-                item.setSelected(True)
-                # Optionally set custom background/foreground here if needed
-                # item.setBackground(QColor("#0078d7")) # Example direct color
-                # item.setForeground(QColor(Qt.white))
-
-            self.queue.addItem(item)
+        current_playlist_index = self.current_idx
+        self._queue_model.reset(self.playlist)
 
-        # Scroll to ensure the current item is visible after refresh
-        if 0 <= current_playlist_index < self.queue.count():
-            self.queue.scrollToItem(self.queue.item(current_playlist_index), QListWidget.EnsureVisible)
+        # Highlight the currently playing/selected row and scroll to it
+        if 0 <= current_playlist_index < len(self.playlist):
+            current = self._queue_model.index(current_playlist_index)
+            self.queue.selectionModel().select(current, QItemSelectionModel.ClearAndSelect)
+            self.queue.scrollTo(current, QListView.EnsureVisible)
 
         # --- Refresh History List ---
-        self.history_list.clear()
-        for track in self.history:
-            # Format duration string
-            duration_str = ""
-            if track.duration_sec is not None and track.duration_sec > 0:
-                 duration_str = f" ({self._fmt_time(track.duration_sec * 1000)})"
-             # Format title with local indicator
-            prefix = "[L] " if track.is_local else ""
-            item_text = f"{prefix}{track.title}{duration_str}"
-
-            item = QListWidgetItem(item_text)
-            # Store the track identifier (webpage_url or url) in the item's data role
-            # This is used in _history_double_clicked to find the track
-            identifier = track.webpage_url or track.url
-            item.setData(Qt.UserRole, identifier)
-            # Set tooltip
-            tooltip_text = f"Titolo: {track.title}\n"
-            tooltip_text += f"ID: {identifier}\n"
-            tooltip_text += f"Locale: {'Sì' if track.is_local else 'No'}"
-            item.setToolTip(tooltip_text)
-
-            self.history_list.addItem(item)
+        # The history only changes in _add_to_history: skip the reset if nothing changed
+        if self._history_shown_version == self._history_version:
+            return
+        self._history_shown_version = self._history_version
+        self._history_model.reset(self.history)
 
 
     def add_to_favorites(self):
@@ -2113,7 +2395,7 @@ class Jukebox(QWidget):
              return
 
         # Check if already in favorites using the identifier
-        if any((fav.webpage_url or fav.url) == identifier for fav in self.favorites):
+        if identifier in self._fav_ids:
             self._info(f"'{track_to_add.title}' è già nei preferiti.")
             return
 
@@ -2128,6 +2410,7 @@ class Jukebox(QWidget):
         )
 
         self.favorites.append(fav_track)
+        self._fav_ids.add(fav_track.identifier)
         save_json("favorites.json", self.favorites) # Save updated favorites
         self._info(f"'{fav_track.title}' aggiunto ai preferiti!")
 
@@ -2176,7 +2459,7 @@ class Jukebox(QWidget):
             selected_fav = display_to_track_map.get(choice_text)
 
             if selected_fav:
-                print(f"Preferito selezionato: {selected_fav.title}")
+                log.debug("Preferito selezionato: %s", selected_fav.title)
 
                 # Create a new Track instance to add to the playlist
                 new_track = Track(
@@ -2196,11 +2479,11 @@ class Jukebox(QWidget):
                 new_index = len(self.playlist) - 1
 
                 if not is_player_playing:
-                     print(f"Player non in riproduzione, avvio brano aggiunto dai preferiti ({new_track.title})")
+                     log.debug("Player non in riproduzione, avvio brano aggiunto dai preferiti (%s)", new_track.title)
                      self.play_track_signal.emit(new_index)
                      self.query_lbl.setText(f"Riproducendo da Preferiti: {new_track.title[:50]}...")
                 else:
-                     print(f"Player in riproduzione, brano aggiunto dai preferiti in coda.")
+                     log.debug("Player in riproduzione, brano aggiunto dai preferiti in coda.")
                      self.query_lbl.setText(f"Aggiunto da Preferiti in coda: {new_track.title[:50]}...")
 
             else:
@@ -2220,18 +2503,29 @@ class Jukebox(QWidget):
             try:
                 # Controlla se è ancora in esecuzione prima di annullare
                 if worker_to_cancel.isRunning():
-                    print(f"Annullamento download copertina precedente (worker {id(worker_to_cancel)})...")
+                    log.debug("Annullamento download copertina precedente (worker %s)...", id(worker_to_cancel))
                     worker_to_cancel.cancel()
                 # Non resettare self.cover_worker qui, verrà gestito dallo slot _on_cover_worker_finished
                 # quando il worker annullato effettivamente termina.
             except RuntimeError:
                 # L'oggetto C++ potrebbe essere già stato cancellato, ignora l'errore
-                print(f"Warning: Impossibile accedere/annullare worker copertina precedente {id(worker_to_cancel)} (potrebbe essere stato eliminato).")
+                log.warning("Impossibile accedere/annullare worker copertina precedente %s (potrebbe essere stato eliminato).", id(worker_to_cancel))
                 # Se il riferimento self.cover_worker puntava ancora all'oggetto eliminato,
                 # è prudente resettarlo ora, anche se _on_cover_worker_finished dovrebbe farlo.
                 if self.cover_worker is worker_to_cancel:
                     self.cover_worker = None
 
+        # Any cover still being decoded belongs to the previous track
+        self._cover_decode_path = None
+
+        # Cover già mostrata di recente: niente hash/stat/decodifica/scalatura
+        cached = self._cover_cache.get(thumbnail_url) if thumbnail_url else None
+        if cached is not None:
+            self._cover_cache.move_to_end(thumbnail_url)
+            self.cover_lbl.setPixmap(cached)
+            self.cover_lbl.setText("")
+            return
+
         # --- Reset to Default Cover ---
         # Fallo subito per mostrare un placeholder mentre si carica la nuova copertina
         self.set_default_cover()
@@ -2250,45 +2544,69 @@ class Jukebox(QWidget):
 
             if local_cache_path.exists():
                 # print(f"Tentativo caricamento copertina dalla cache: {local_cache_path.name}") # Debug
-                pix = QPixmap(str(local_cache_path))
-                if not pix.isNull():
-                    # Cache hit e immagine valida caricata con successo
-                    # print("Cache hit, copertina caricata.") # Debug
-                    self._handle_cover_ready(pix)
-                    return # Fatto, esci dal metodo
+                path_str = str(local_cache_path)
+                pix = QPixmapCache.find(path_str)
+                if pix is not None:
+                    # Già decodificata in memoria
+                    self._handle_cover_ready(pix, thumbnail_url)
                 else:
-                    # Il file cache esiste ma è corrotto o illeggibile
-                    print(f"Errore caricamento file cache copertina: {local_cache_path.name}. Rimuovo e tento il download.")
-                    try:
-                        local_cache_path.unlink() # Cancella il file corrotto
-                    except OSError as e:
-                        print(f"Impossibile cancellare file cache corrotto {local_cache_path.name}: {e}")
-
-            # --- Cache Miss or Invalid Cache: Start Download ---
+                    # Decodifica il file in un thread del pool, la GUI non si blocca (vedi _handle_cover_decoded)
+                    self._cover_decode_path = path_str
+                    self._cover_decode_url = thumbnail_url
+                    task = CoverDecodeTask(path_str)
+                    task.signals.decoded.connect(self._handle_cover_decoded)
+                    QThreadPool.globalInstance().start(task)
+                return
+
+            # --- Cache Miss: Start Download ---
             # print(f"Cache miss per copertina {thumbnail_url}. Avvio download...") # Debug
-
-            # Crea e assegna il NUOVO worker a self.cover_worker
-            # Sovrascrive il riferimento precedente (che dovrebbe essere None o puntare
-            # a un worker già annullato/finito).
-            self.cover_worker = CoverDownloadWorker(thumbnail_url, local_cache_path)
-            print(f"Creato nuovo CoverDownloadWorker {id(self.cover_worker)} per {thumbnail_url[:50]}...")
-
-            # Connetti i segnali del nuovo worker
-            self.cover_worker.cover_ready.connect(self._handle_downloaded_cover_ready)
-            self.cover_worker.cover_error.connect(self._handle_cover_error)
-            # Connetti finished allo SLOT DEDICATO per la pulizia
-            self.cover_worker.finished.connect(self._on_cover_worker_finished)
-
-            # !!! Riga importante: NON collegare finished a deleteLater qui !!!
-
-            # Avvia il download in background
-            self.cover_worker.start()
+            self._start_cover_download(thumbnail_url, local_cache_path)
 
         except Exception as e:
              # Cattura errori durante hashing, manipolazione path, o creazione worker
-             import traceback
-             print(f"Errore nella logica di caching/download copertina per URL {thumbnail_url}: {e}\n{traceback.format_exc()}")
+             log.exception("Errore nella logica di caching/download copertina per URL %s: %s", thumbnail_url, e)
              self.set_default_cover() # Assicura che venga mostrata la copertina di default in caso di errore
+
+    def _start_cover_download(self, thumbnail_url, local_cache_path):
+        """Starts a CoverDownloadWorker that saves thumbnail_url to local_cache_path."""
+        # Crea e assegna il NUOVO worker a self.cover_worker
+        # Sovrascrive il riferimento precedente (che dovrebbe essere None o puntare
+        # a un worker già annullato/finito).
+        self.cover_worker = CoverDownloadWorker(thumbnail_url, local_cache_path)
+        log.debug("Creato nuovo CoverDownloadWorker %s per %s...", id(self.cover_worker), thumbnail_url[:50])
+
+        # Connetti i segnali del nuovo worker
+        self.cover_worker.cover_ready.connect(self._handle_downloaded_cover_ready)
+        self.cover_worker.cover_error.connect(self._handle_cover_error)
+        # Connetti finished allo SLOT DEDICATO per la pulizia
+        self.cover_worker.finished.connect(self._on_cover_worker_finished)
+
+        # !!! Riga importante: NON collegare finished a deleteLater qui !!!
+
+        # Avvia il download in background
+        self.cover_worker.start()
+
+    def _handle_cover_decoded(self, path_str, image):
+        """Receives a cached cover decoded by CoverDecodeTask (main thread)."""
+        if path_str != self._cover_decode_path:
+            return # The track changed meanwhile
+        self._cover_decode_path = None
+        if not image.isNull():
+            pix = QPixmap.fromImage(image)
+            QPixmapCache.insert(path_str, pix)
+            self._handle_cover_ready(pix, self._cover_decode_url)
+            return
+        # Il file cache esiste ma è corrotto o illeggibile
+        local_cache_path = Path(path_str)
+        log.error("Errore caricamento file cache copertina: %s. Rimuovo e tento il download.", local_cache_path.name)
+        try:
+            local_cache_path.unlink() # Cancella il file corrotto
+        except OSError as e:
+            log.warning("Impossibile cancellare file cache corrotto %s: %s", local_cache_path.name, e)
+        try:
+            self._start_cover_download(self._cover_decode_url, local_cache_path)
+        except Exception as e:
+            log.error("Errore avviando il download della copertina %s: %s", self._cover_decode_url, e)
         # Dentro la classe Jukebox in jukebox_gui.py
 
     def _handle_downloaded_cover_ready(self, file_path_str):
@@ -2302,26 +2620,26 @@ class Jukebox(QWidget):
         # Se un segnale arriva, lo processiamo assumendo che sia rilevante
         # per l'operazione che quel worker stava eseguendo.
 
-        print(f"Cover scaricata e salvata in: {file_path_str} (da worker {worker_id})")
+        log.debug("Cover scaricata e salvata in: %s (da worker %s)", file_path_str, worker_id)
 
         # Carica il file immagine scaricato in una QPixmap
-        pix = QPixmap(file_path_str)
+        pix = _cached_pixmap(file_path_str)
 
         if not pix.isNull():
              # Immagine caricata con successo, chiamiamo l'handler comune per visualizzarla
-             self._handle_cover_ready(pix)
+             self._handle_cover_ready(pix, getattr(sender_worker, 'url', None))
         else:
              # Il file è stato salvato ma non può essere caricato come QPixmap
              # (potrebbe essere corrotto, o un formato immagine non supportato da Qt in questo contesto).
-             print(f"Errore caricamento QPixmap dalla cover scaricata: {file_path_str}")
+             log.error("Errore caricamento QPixmap dalla cover scaricata: %s", file_path_str)
              self.set_default_cover() # Ripristina la copertina di default
 
              # Opzionale ma consigliato: cancella il file potenzialmente corrotto
              try:
                  Path(file_path_str).unlink()
-                 print(f"File cover corrotto/illeggibile cancellato: {file_path_str}")
+                 log.debug("File cover corrotto/illeggibile cancellato: %s", file_path_str)
              except OSError as e:
-                 print(f"Impossibile cancellare file cover scaricato ({file_path_str}): {e}")
+                 log.warning("Impossibile cancellare file cover scaricato (%s): %s", file_path_str, e)
 
 
     def _handle_cover_error(self):
@@ -2333,7 +2651,7 @@ class Jukebox(QWidget):
         # --- Rimuoviamo il controllo sul worker corrente ---
         # L'errore è rilevante per l'operazione che il worker specifico stava tentando.
 
-        print(f"Errore durante il download della copertina (da worker {worker_id}).")
+        log.error("Errore durante il download della copertina (da worker %s).", worker_id)
 
         # Non c'è bisogno di chiamare self.set_default_cover() qui,
         # perché la copertina di default dovrebbe essere già stata impostata
@@ -2341,8 +2659,8 @@ class Jukebox(QWidget):
         # self.set_default_cover()
 
 
-    def _handle_cover_ready(self, pixmap):
-        """Displays the loaded QPixmap in the cover label."""
+    def _handle_cover_ready(self, pixmap, thumbnail_url=None):
+        """Displays the loaded QPixmap in the cover label and remembers it scaled for thumbnail_url."""
         if self.cover_lbl and not pixmap.isNull():
             # Scale pixmap to fit the label while keeping aspect ratio
             scaled_pixmap = pixmap.scaled(
@@ -2352,6 +2670,12 @@ class Jukebox(QWidget):
             )
             self.cover_lbl.setPixmap(scaled_pixmap)
             self.cover_lbl.setText("") # Clear any "No Cover" text
+            if thumbnail_url:
+                cache = self._cover_cache
+                cache[thumbnail_url] = scaled_pixmap
+                cache.move_to_end(thumbnail_url)
+                if len(cache) > COVER_CACHE_MAX:
+                    cache.popitem(last=False) # Evict the least recently shown cover
         else:
              # If pixmap is null or label doesn't exist, ensure default
              self.set_default_cover()
@@ -2360,20 +2684,22 @@ class Jukebox(QWidget):
     def set_default_cover(self):
         """Sets the cover label to the default placeholder image."""
         if self.cover_lbl:
-             # Load default cover pixmap (ensure DEFAULT_COVER path is correct)
-             default_pixmap = QPixmap(str(DEFAULT_COVER))
-             if not default_pixmap.isNull():
-                 # Scale and set the default pixmap
-                 scaled_default = default_pixmap.scaled(
-                     self.cover_lbl.size(),
-                     Qt.KeepAspectRatio,
-                     Qt.SmoothTransformation
-                 )
+             # Default già scalata per la label in QPixmapCache: niente lettura da disco né scalatura ad ogni cambio brano
+             size = self.cover_lbl.size()
+             cache_key = f"jukebox:default_cover:{size.width()}x{size.height()}"
+             scaled_default = QPixmapCache.find(cache_key)
+             if scaled_default is None:
+                 # Load default cover pixmap (ensure DEFAULT_COVER path is correct)
+                 default_pixmap = QPixmap(str(DEFAULT_COVER))
+                 if not default_pixmap.isNull():
+                     scaled_default = default_pixmap.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                     QPixmapCache.insert(cache_key, scaled_default)
+             if scaled_default is not None:
                  self.cover_lbl.setPixmap(scaled_default)
                  self.cover_lbl.setText("") # Clear text
              else:
                  # If default image file is missing or invalid
-                 print(f"Warning: Default cover file non trovato o non valido: {DEFAULT_COVER}")
+                 log.warning("Default cover file non trovato o non valido: %s", DEFAULT_COVER)
                  self.cover_lbl.clear() # Clear any existing pixmap
                  self.cover_lbl.setText("No Cover") # Show text fallback
                  # Apply basic text styling if needed
@@ -2398,7 +2724,7 @@ class Jukebox(QWidget):
         if sender_worker == self.yt_search_worker:
              if self.loading_movie:
                  self.loading_lbl.hide()
-                 # movie.stop() # Optional: stop animation to save resources
+                 self.loading_movie.stop() # No frame timer while hidden
              else:
                  # If using text fallback, clear it only if it shows "Caricamento..."
                  if "Caricamento..." in self.query_lbl.text():
@@ -2419,105 +2745,107 @@ class Jukebox(QWidget):
         """Toggles the window between fullscreen and normal state."""
         if self.isFullScreen():
             self.showNormal() # Restore previous size/position
-            print("Uscita da modalità schermo intero.")
+            log.debug("Uscita da modalità schermo intero.")
         else:
             self.showFullScreen()
-            print("Entrata in modalità schermo intero.")
+            log.debug("Entrata in modalità schermo intero.")
 
     # --- Cleanup on Close ---
     def closeEvent(self, event):
         """Handles the window closing event for proper cleanup."""
-        print("Chiusura Jukebox in corso...")
+        log.info("Chiusura Jukebox in corso...")
 
         # --- 1. Stop Timers ---
         if hasattr(self, 't') and self.t:
              self.t.stop()
-             print("Timer UI fermato.")
+             log.debug("Timer UI fermato.")
 
         # --- 2. Cancel Running Workers ---
         workers_to_stop = []
         if self.yt_search_worker and self.yt_search_worker.isRunning():
-             print("Annullamento worker ricerca YouTube...")
+             log.debug("Annullamento worker ricerca YouTube...")
              self.yt_search_worker.cancel()
              workers_to_stop.append(self.yt_search_worker)
 
         if self.cover_worker and self.cover_worker.isRunning():
-             print("Annullamento worker download copertina...")
+             log.debug("Annullamento worker download copertina...")
              self.cover_worker.cancel()
              workers_to_stop.append(self.cover_worker)
 
-        active_probes = [w for w in self.probe_workers if w and w.isRunning()]
-        if active_probes:
-             print(f"Annullamento {len(active_probes)} worker probe file...")
-             for worker in active_probes:
-                 worker.cancel()
-                 workers_to_stop.append(worker)
+        if self._probe_tasks:
+             log.debug("Annullamento %s probe file...", len(self._probe_tasks))
+             for task in self._probe_tasks:
+                 task.cancel()
+             self._probe_tasks.clear()
 
         # --- Wait briefly for workers to acknowledge cancellation ---
         if workers_to_stop:
-            print("Attendendo brevemente la terminazione dei worker...")
+            log.debug("Attendendo brevemente la terminazione dei worker...")
             # Use QThread.wait() for a short period
             deadline = time.time() + 1.0 # Max 1 second wait total
             for worker in workers_to_stop:
                  remaining_time = deadline - time.time()
                  if remaining_time > 0:
                       if not worker.wait(int(remaining_time * 1000)): # wait expects ms
-                           print(f"Warning: Worker {type(worker).__name__} non ha terminato entro il timeout.")
+                           log.warning("Worker %s non ha terminato entro il timeout.", type(worker).__name__)
                  else:
-                      print(f"Warning: Timeout attesa worker {type(worker).__name__}.")
-            print("Tentativo di stop worker completato.")
+                      log.warning("Timeout attesa worker %s.", type(worker).__name__)
+            log.debug("Tentativo di stop worker completato.")
+        # Pool tasks (file probes, cover decoding) have no wait(): wait for the pool instead
+        if not QThreadPool.globalInstance().waitForDone(1000):
+            log.warning("Task del thread pool non terminati entro il timeout.")
 
 
         # --- 3. Stop and Release VLC Player ---
         if self.player:
-            print("Stop e rilascio player VLC...")
+            log.debug("Stop e rilascio player VLC...")
             try:
-                if self.player.is_playing():
-                    self.player.stop() # Stop playback first
-
-                # Detach events (optional but good practice)
+                # Detach events first: the Stopped event from stop() must not reach a window being destroyed
                 if self.event_manager:
                      # Check if methods exist before calling (robustness)
                      if hasattr(self.event_manager, 'event_detach'):
-                          try:
-                              self.event_manager.event_detach(vlc.EventType.MediaPlayerEndReached)
-                              self.event_manager.event_detach(vlc.EventType.MediaPlayerEncounteredError)
-                              # Detach other events if attached
-                          except Exception as e_detach:
-                               print(f"Errore durante detach eventi VLC: {e_detach}")
+                          for event_type in _PLAYER_EVENTS: # Same events attached in __init__
+                              try:
+                                  self.event_manager.event_detach(event_type)
+                              except Exception as e_detach:
+                                   log.error("Errore durante detach eventi VLC: %s", e_detach)
+
+                if self.player.is_playing():
+                    self.player.stop() # Stop playback
 
                 # Release the player instance
                 self.player.release()
-                print("Player VLC rilasciato.")
+                log.debug("Player VLC rilasciato.")
             except Exception as e_vlc:
-                 print(f"Errore durante stop/rilascio player VLC: {e_vlc}")
+                 log.error("Errore durante stop/rilascio player VLC: %s", e_vlc)
             self.player = None # Clear reference
 
 
         # --- 4. Hide Virtual Keyboard ---
-        if self.vkbd.isVisible():
+        if self.vkbd and self.vkbd.isVisible():
              self.vkbd.hide()
 
         # --- 5. Save Data ---
         try:
-            print("Salvataggio dati (playlist, cronologia, preferiti)...")
+            log.debug("Salvataggio dati (playlist, cronologia, preferiti)...")
             save_json("playlist.json", self.playlist)
             save_json("history.json", self.history)
             save_json("favorites.json", self.favorites)
-            print("Dati salvati.")
+            flush_json() # Write queued saves now, the writer thread dies with the process
+            log.info("Dati salvati.")
         except Exception as e_save:
-            print(f"Errore durante il salvataggio dei dati JSON: {e_save}")
+            log.error("Errore durante il salvataggio dei dati JSON: %s", e_save)
 
 
         # --- 6. Accept Close Event ---
-        print("Jukebox chiuso.")
+        log.info("Jukebox chiuso.")
         event.accept() # Allow window to close
 
     # --- Keyboard Event Handling (for Virtual Keyboard input simulation) ---
     def keyPressEvent(self, event):
          """Handles key presses, potentially forwarding them to the virtual keyboard."""
          # If VKBD is visible AND target is the search input, simulate VKBD input
-         if self.vkbd.isVisible() and self.vkbd.target_widget == self.search_in:
+         if self.vkbd and self.vkbd.isVisible() and self.vkbd.target_widget == self.search_in:
               key = event.key()
               text = event.text()
 
@@ -2556,18 +2884,10 @@ if __name__ == "__main__":
     # --- Apply Style ---
     # Optional: Force a specific style like Fusion for consistency
     app.setStyle("Fusion")
+    app.setStyleSheet(_MAIN_QSS) # Application-wide CSS, parsed once
+    QPixmapCache.setCacheLimit(PIXMAP_CACHE_LIMIT_KB)
 
-    # --- Ensure Data Directories Exist ---
-    # These are defined in jukebox_data, but ensure they are created before Jukebox init
-    try:
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        COVER_DIR.mkdir(parents=True, exist_ok=True)
-        DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
-    except Exception as e:
-         QMessageBox.critical(None, "Errore Creazione Cartelle Dati",
-                              f"Impossibile creare le cartelle necessarie in {DATA_DIR.parent}.\n"
-                              f"Verifica i permessi.\n\nDettagli: {e}")
-         sys.exit(1)
+    # Data directories are created by jukebox_data at import time
 
 
     # --- Create and Show Main Window ---
@@ -2578,8 +2898,7 @@ if __name__ == "__main__":
         # jukebox.show() # Normal window
         jukebox.showMaximized() # Maximized window
     except Exception as e_init:
-         import traceback
-         print(f"Errore CRITICO durante l'inizializzazione di Jukebox: {e_init}\n{traceback.format_exc()}")
+         log.critical("Errore CRITICO durante l'inizializzazione di Jukebox: %s", e_init, exc_info=True)
          QMessageBox.critical(None, "Errore Avvio Jukebox",
                               f"Si è verificato un errore irreversibile durante l'avvio.\n\nDettagli: {e_init}")
          # Ensure VLC instance is released even if Jukebox init failed partially
@@ -2597,16 +2916,16 @@ if __name__ == "__main__":
     # This happens *after* Jukebox.closeEvent has already released the player
     # This releases the main VLC library instance.
     if 'vlc_instance' in globals() and vlc_instance is not None:
-         print("Rilascio istanza VLC globale...")
+         log.debug("Rilascio istanza VLC globale...")
          try:
              vlc_instance.release()
              vlc_instance = None # Clear reference
-             print("Istanza VLC globale rilasciata.")
+             log.debug("Istanza VLC globale rilasciata.")
          except Exception as e_vlc_global:
-             print(f"Errore durante il rilascio dell'istanza VLC globale: {e_vlc_global}")
+             log.error("Errore durante il rilascio dell'istanza VLC globale: %s", e_vlc_global)
 
 
     # --- Exit ---
     sys.exit(exit_code)
 
-print("jukebox_gui.py loaded.")
\ No newline at end of file
+log.debug("jukebox_gui.py loaded.")
\ No newline at end of file
@@ -3,46 +3,294 @@
 # Contiene le classi QThread per le operazioni in background
 # (Ricerca YouTube, Download Copertine, Analisi File Locali).
 
+import os
+import re
+import sys
 import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
-import yt_dlp
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import vlc
 from pathlib import Path
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QObject, QRunnable, QThread, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader
+
+try:
+    import mutagen # Lettura veloce della durata dagli header dei file (opzionale, fallback su VLC)
+except ImportError:
+    mutagen = None
 
 # Importa elementi necessari dal modulo data
-from jukebox_data import Track, DOWNLOAD_DIR, AUDIO_EXTS, FFMPEG_PATH, YOUTUBE_REGEX
+from jukebox_data import Track, DOWNLOAD_DIR, AUDIO_EXTS, ffmpeg_path, extract_yt_id, json_dumps, json_loads
+
+log = logging.getLogger("jukebox.workers") # Configured by jukebox_data (basicConfig)
+
+# Sessione HTTP condivisa per le copertine: riusa le connessioni keep-alive verso i CDN
+# (i.ytimg.com ecc.) invece di pagare un handshake TCP+TLS per ogni immagine.
+_COVER_SESSION = requests.Session()
+_COVER_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8', # Accept various image types
+    'Accept-Language': 'en-US,en;q=0.9',
+})
+_cover_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32,
+                             max_retries=Retry(total=2, backoff_factor=0.2))
+_COVER_SESSION.mount("http://", _cover_adapter)
+_COVER_SESSION.mount("https://", _cover_adapter)
+
+# Cache su disco dei metadati yt-dlp per le ricerche senza download: ripetere la stessa
+# ricerca/URL non rilancia extract_info (che per YouTube può richiedere diversi secondi).
+META_CACHE_DIR = DOWNLOAD_DIR / ".meta_cache"
+# Gli URL di streaming nei risultati scadono dopo alcune ore: TTL ben al di sotto di quel limite
+META_CACHE_TTL_SEC = 3600
+META_CACHE_MAX_FILES = 200 # Oltre questo numero i file più vecchi vengono rimossi (vedi _prune_meta_cache)
+# Campi delle entry effettivamente usati da YoutubeSearchWorker.run (il resto non viene salvato)
+_META_FIELDS = ("title", "thumbnail", "duration", "webpage_url", "original_url",
+                "id", "extractor", "extractor_key", "url", "ext")
+
+def _meta_cache_key(ytq, opts):
+    """Returns the cache file key for a yt-dlp query and the options that change its result."""
+    raw = f"{ytq}|flat={opts['extract_flat']}|noplaylist={opts['noplaylist']}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+def _read_meta_cache(key):
+    """Returns the cached info dict for key, or None if missing, expired or unreadable."""
+    cache_file = META_CACHE_DIR / f"{key}.json"
+    try:
+        if time.time() - cache_file.stat().st_mtime > META_CACHE_TTL_SEC:
+            cache_file.unlink() # Expired: it would never be read again
+            return None
+        return json_loads(cache_file.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+def _prune_meta_cache():
+    """Deletes expired cache files, then the oldest ones beyond META_CACHE_MAX_FILES."""
+    try:
+        with os.scandir(META_CACHE_DIR) as it:
+            files = [(entry.stat().st_mtime, entry.path) for entry in it
+                     if entry.is_file() and entry.name.endswith(".json")]
+    except OSError:
+        return
+    files.sort(reverse=True) # Newest first
+    expired_before = time.time() - META_CACHE_TTL_SEC
+    for i, (mtime, path) in enumerate(files):
+        if i >= META_CACHE_MAX_FILES or mtime < expired_before:
+            try: os.remove(path)
+            except OSError: pass
+
+def _write_meta_cache(key, info):
+    """Stores a trimmed copy of a yt-dlp info dict (errors are ignored: it's only a cache)."""
+    entries = info.get("entries") if "entries" in info else [info]
+    trimmed = []
+    for entry in entries or ():
+        if not entry: continue
+        item = {k: entry[k] for k in _META_FIELDS if entry.get(k) is not None}
+        if not item.get("thumbnail") and entry.get("thumbnails"):
+            item["thumbnails"] = [{"url": entry["thumbnails"][0].get("url")}] # Only the first one is read
+        trimmed.append(item)
+    if not trimmed: # Don't cache empty results (often a transient network/extractor error)
+        return
+    try:
+        META_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file = META_CACHE_DIR / f"{key}.json"
+        tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+        tmp_file.write_bytes(json_dumps({"entries": trimmed}))
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        log.warning("Impossibile scrivere la cache metadati: %s", e)
+        return
+    _prune_meta_cache() # Keeps the directory bounded: one file per distinct query otherwise
+
+# Le copertine vengono scritte su disco a blocchi di questa dimensione (una os.write per blocco)
+_COVER_WRITE_BATCH = 256 * 1024
+
+def _write_all(fd, data):
+    """Writes all of data to the file descriptor fd (os.write may write less than requested)."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+# yt_dlp (estrattori compresi) costa centinaia di ms all'import: lo si carica alla prima ricerca,
+# non prima che la finestra sia visibile
+yt_dlp = None
+
+def _ensure_yt_dlp():
+    """Imports yt_dlp on first use and binds it to the module-level name."""
+    global yt_dlp
+    if yt_dlp is None:
+        import yt_dlp as _yt_dlp
+        yt_dlp = _yt_dlp
+    return yt_dlp
+
+def _entry_key(entry):
+    """Identifies a yt-dlp entry across the dict copies yt-dlp makes while processing it."""
+    return (entry.get('extractor_key') or entry.get('extractor'), entry.get('id'))
+
+def _download_done_pp(callback):
+    """Returns a yt-dlp postprocessor that calls callback(info) once each file is final (after_move)."""
+    class _DownloadDonePP(yt_dlp.postprocessor.PostProcessor):
+        def run(self, info):
+            callback(info)
+            return [], info
+    return _DownloadDonePP()
+
+# Istanze YoutubeDL riusate tra una ricerca e l'altra: la costruzione carica tutti gli
+# estrattori e prepara le connessioni, lavoro che così si paga una volta sola per set di opzioni.
+class _CachedYDL:
+    """A YoutubeDL kept alive across searches, used by one worker at a time."""
+    def __init__(self, opts):
+        self.lock = threading.Lock() # Held by the worker currently using the instance
+        self.hook = None             # Progress hook of that worker
+        self.match = None            # match_filter of that worker
+        self.done = None             # Finished-download callback of that worker
+        self.opts = dict(opts)
+        self.ydl = None              # Built by its first user, outside _YDL_CACHE_LOCK (see _acquire_ydl)
+
+    def build(self):
+        if self.ydl is None:
+            ydl = yt_dlp.YoutubeDL(dict(self.opts, progress_hooks=[self._dispatch_hook],
+                                        match_filter=self._dispatch_match))
+            ydl.add_post_processor(_download_done_pp(self._dispatch_done), when='after_move')
+            self.ydl = ydl
+
+    def _dispatch_hook(self, d):
+        if self.hook is not None:
+            self.hook(d)
+
+    def _dispatch_match(self, info, *, incomplete=False):
+        if self.match is not None:
+            return self.match(info, incomplete=incomplete)
+        return None
+
+    def _dispatch_done(self, info):
+        if self.done is not None:
+            self.done(info)
+
+    def release(self):
+        self.hook = None
+        self.match = None
+        self.done = None
+        self.lock.release()
+
+_YDL_CACHE = {}                  # Options key -> list of _CachedYDL
+_YDL_CACHE_LOCK = threading.Lock()
+_YDL_POOL_MAX = 8                # Instances kept per options key (= parallel extractions in _enrich_entries)
+
+_PER_WORKER_OPTS = ('progress_hooks', 'match_filter') # Callbacks bound to the worker, dispatched by _CachedYDL
+
+def _acquire_ydl(opts, hook, match, done=None):
+    """Returns an idle cached YoutubeDL wrapper for opts, locked and wired to hook/match/done.
+
+    Returns None if all _YDL_POOL_MAX instances for these options are busy.
+    """
+    key = repr(sorted((k, v) for k, v in opts.items() if k not in _PER_WORKER_OPTS))
+    with _YDL_CACHE_LOCK:
+        pool = _YDL_CACHE.setdefault(key, [])
+        cached = next((c for c in pool if c.lock.acquire(blocking=False)), None)
+        if cached is None:
+            if len(pool) >= _YDL_POOL_MAX:
+                return None
+            cached = _CachedYDL(opts)
+            cached.lock.acquire()
+            pool.append(cached)
+    try:
+        cached.build() # Slow only the first time (extractors), and without holding the cache lock
+    except Exception:
+        cached.lock.release()
+        raise
+    cached.hook = hook
+    cached.match = match
+    cached.done = done
+    return cached
+
+# Classificazione della query (case-insensitive, una sola scansione in C invece di più .lower()/any())
+_URL_RE = re.compile(r'^http|youtube\.com/|youtu\.be/|soundcloud\.com/|vimeo\.com/', re.I)
+_PLAYLIST_RE = re.compile(r'list=|/playlist\?|/sets/', re.I) # Copre anche music.youtube.com/playlist e SoundCloud /sets/
+
+# Le copertine vengono salvate già ridotte alla dimensione dell'etichetta della GUI (320x180)
+COVER_THUMB_SIZE = (320, 180)
+
+def _shrink_cover(path):
+    """Re-saves a downloaded cover at COVER_THUMB_SIZE, so the GUI never decodes the full-size image.
+
+    Uses JPEG draft mode (libjpeg decodes directly at a reduced scale). Leaves the file as is
+    if Pillow is missing, the image is already small enough or anything goes wrong.
+    """
+    try:
+        from PIL import Image # Import lazy: Pillow è opzionale
+    except ImportError:
+        return
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with Image.open(path) as im:
+            if im.width <= COVER_THUMB_SIZE[0] and im.height <= COVER_THUMB_SIZE[1]:
+                return
+            im.draft('RGB', COVER_THUMB_SIZE) # Solo JPEG, no-op per gli altri formati
+            im = im.convert('RGB')
+            im.thumbnail(COVER_THUMB_SIZE, Image.LANCZOS)
+            im.save(tmp_path, 'JPEG', quality=85, optimize=True)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        log.debug("Impossibile ridimensionare la copertina %s: %s", path, e)
+        try: tmp_path.unlink()
+        except OSError: pass
+
+# Istanza VLC condivisa da tutti i FileProbeTask: i plugin vengono caricati una sola volta per processo
+_PROBE_VLC = None
+_PROBE_VLC_LOCK = threading.Lock()
+
+def _get_probe_vlc():
+    """Returns the process-wide VLC instance used for probing, creating it on first use."""
+    global _PROBE_VLC
+    with _PROBE_VLC_LOCK:
+        if _PROBE_VLC is None:
+            # Separata dall'istanza del player principale; solo parsing, niente output audio/video
+            args = ['--quiet', '--no-video', '--no-audio']
+            if sys.platform.startswith('linux'): args.append('--no-xlib')
+            _PROBE_VLC = vlc.Instance(args)
+        return _PROBE_VLC
+
+PROGRESS_EMIT_INTERVAL_NS = 150_000_000 # Intervallo minimo tra due aggiornamenti di download (150 ms)
 
 # -------------------- Worker Threads --------------------
 
 class YoutubeSearchWorker(QThread):
     """Worker thread for performing YouTube searches or extracting info/downloading from URLs."""
     results_ready = pyqtSignal(list) # Emits list of Track objects
+    track_ready = pyqtSignal(object) # Emits each Track as soon as it is ready (results_ready still sent at the end)
     error_occurred = pyqtSignal(str)
     progress_update = pyqtSignal(str) # Emits status messages for the UI
 
-    def __init__(self, query, num_results, download_audio: bool):
+    def __init__(self, query, num_results, download_audio: bool, embed_metadata: bool = False):
         super().__init__()
         self.query = query
         self.num_results = num_results
         self.download_audio = download_audio
+        self.embed_metadata = embed_metadata # Also download the thumbnail and embed it in the MP3 (extra FFmpeg pass)
         self._is_cancelled = False
         self._ydl = None # Store the yt-dlp instance for potential cancellation
+        self._last_emit_ns = 0 # Ultimo aggiornamento di download inviato alla UI
+        self._streamed = {} # _entry_key -> Track già inviato con track_ready durante l'estrazione
 
     def cancel(self):
-        """Signals the worker to stop processing."""
+        """Signals the worker to stop processing.
+
+        yt-dlp notices the flag in _match (before each entry is processed) and in _hook
+        (on every download chunk), which raise DownloadCancelled inside extract_info.
+        """
         self._is_cancelled = True
-        # Attempt to signal yt-dlp if it's active
-        if self._ydl:
-            try:
-                # Use internal flag if available (may change in future yt-dlp versions)
-                if hasattr(self._ydl, '_download_retries'): # Heuristic to check if download started
-                    # Injecting a stop signal might be complex/unreliable.
-                    # Relying on the progress hook check is safer.
-                    print("YT Worker: Cancellation requested during potential download.")
-                    pass
-            except Exception as e:
-                print(f"Error during yt-dlp cancellation signal: {e}")
+
+    def _match(self, info, *, incomplete=False):
+        """Yt-dlp match_filter: accepts every entry, but aborts the extraction once cancelled."""
+        if self._is_cancelled:
+            raise yt_dlp.utils.DownloadCancelled()
+        return None # None = entry accepted
 
     def _hook(self, d):
         """Yt-dlp progress hook to check cancellation flag and report download progress."""
@@ -58,6 +306,11 @@ class YoutubeSearchWorker(QThread):
              title_short = d.get('title', d.get('id', '...'))[:40]
              self.progress_update.emit(f"Estrazione info: {title_short}...")
         elif status == 'downloading' and self.download_audio:
+            # yt-dlp chiama l'hook decine di volte al secondo: limita gli emit a ~6/s
+            now = time.monotonic_ns()
+            if now - self._last_emit_ns < PROGRESS_EMIT_INTERVAL_NS:
+                return
+            self._last_emit_ns = now
             total_bytes_str = d.get('total_bytes_str') or d.get('total_bytes_estimate_str')
             downloaded_bytes = d.get('downloaded_bytes', 0)
             elapsed_str = d.get('elapsed_str', '')
@@ -83,7 +336,6 @@ class YoutubeSearchWorker(QThread):
              # Extract the name before potential parenthesis (like 'FFmpegExtractAudio(finalize)' -> 'FFmpegExtractAudio')
              pp_name = pp_key.split('(')[0] if pp_key else "Conversione" # <-- CORRETTO: Usa la variabile pp_key
              self.progress_update.emit(f"{pp_name}: {title_short}...")
-             self.progress_update.emit(f"{pp_name}: {title_short}...")
 
         elif status == 'finished':
              if self.download_audio:
@@ -93,11 +345,110 @@ class YoutubeSearchWorker(QThread):
                  pass # Avoid emitting message here if only extracting info
 
 
+    def _enrich_entries(self, flat_entries, opts):
+        """Extracts the full info of flat search results concurrently, preserving their order.
+
+        YoutubeDL instances are not thread-safe: each extraction borrows one from the shared
+        per-options pool (_acquire_ydl), so they are built once and reused by later searches.
+        """
+        flat_entries = [e for e in flat_entries if e and (e.get('url') or e.get('webpage_url'))]
+        if not flat_entries:
+            return []
+        enrich_opts = dict(opts, extract_flat=False)
+
+        def enrich(entry):
+            if self._is_cancelled: return None
+            cached = _acquire_ydl(enrich_opts, self._hook, self._match)
+            ydl = cached.ydl if cached else yt_dlp.YoutubeDL(enrich_opts) # Pool exhausted: private instance
+            try:
+                return ydl.extract_info(entry.get('url') or entry.get('webpage_url'), download=False)
+            except yt_dlp.utils.DownloadError as e: # Skip the single failing result
+                log.warning("Impossibile estrarre %s: %s", entry.get('title', entry.get('id')), e)
+                return None
+            finally:
+                if cached:
+                    cached.release()
+                else:
+                    ydl.close()
+
+        enriched = [None] * len(flat_entries)
+        next_to_stream = 0 # Results are streamed in search order: as soon as the prefix is complete
+        with ThreadPoolExecutor(max_workers=min(_YDL_POOL_MAX, len(flat_entries))) as pool:
+            futures = {pool.submit(enrich, entry): i for i, entry in enumerate(flat_entries)}
+            pending = set(range(len(flat_entries)))
+            for future in as_completed(futures):
+                i = futures[future]
+                enriched[i] = future.result() # Re-raises DownloadCancelled from _match
+                pending.discard(i)
+                while next_to_stream < len(flat_entries) and next_to_stream not in pending:
+                    if enriched[next_to_stream] and next_to_stream < self.num_results:
+                        self._stream_entry(enriched[next_to_stream])
+                    next_to_stream += 1
+        return [e for e in enriched if e]
+
+    def _entry_to_track(self, entry, local_path=None):
+        """Builds the Track for a yt-dlp entry: the downloaded file if local_path is given, else the stream URL."""
+        title = entry.get("title", "Titolo Sconosciuto")
+        # Try different thumbnail keys yt-dlp might use
+        thumbnail_url = entry.get("thumbnail") or \
+                        (entry.get("thumbnails")[0].get("url") if entry.get("thumbnails") else None)
+        duration_sec = entry.get("duration", 0)
+        webpage_url = entry.get("webpage_url") or entry.get("original_url") # YouTube page etc.
+        video_id = entry.get("id")
+        extractor = entry.get("extractor_key", "Generic").lower()
+
+        if local_path is not None:
+             url_to_use = str(Path(local_path).resolve())
+             is_local_track = True
+             log.info("Download successful: %s", Path(local_path).name)
+        else:
+             # Not downloaded (or the download failed): stream URL (best available audio format)
+             url_to_use = entry.get("url")
+             is_local_track = False
+             if not url_to_use and webpage_url:
+                 log.warning("Stream URL missing for %s, using webpage_url as last resort.", title)
+                 url_to_use = webpage_url # Last resort
+
+        # Ensure webpage_url is sensible (especially for YouTube)
+        if not webpage_url and video_id and extractor in ['youtube', 'youtubetab']:
+             webpage_url = f"https://www.youtube.com/watch?v={video_id}"
+
+        return Track(
+            url=url_to_use,
+            title=title,
+            thumbnail_url=thumbnail_url,
+            duration_sec=duration_sec or 0, # Ensure it's not None
+            is_local=is_local_track,
+            webpage_url=webpage_url
+        )
+
+    def _stream_entry(self, entry, local_path=None):
+        """Emits track_ready for an entry while extraction is still running (the final pass skips it)."""
+        if self._is_cancelled or entry.get('id') is None:
+            return
+        key = _entry_key(entry)
+        if key in self._streamed:
+            return
+        track = self._entry_to_track(entry, local_path)
+        if track.url:
+            self._streamed[key] = track
+            self.track_ready.emit(track)
+
+    def _on_download_done(self, info):
+        """after_move postprocessor callback: one file downloaded and converted, emit its Track now."""
+        if not self.download_audio:
+            return
+        filepath = info.get('filepath')
+        if filepath and os.path.exists(filepath):
+            self._stream_entry(info, filepath)
+
     def run(self):
         """Runs the yt-dlp extraction/download process."""
         if self._is_cancelled: return
+        _ensure_yt_dlp() # Deferred import (see _ensure_yt_dlp); everything below runs after this
+        self._streamed.clear()
 
-        is_url = self.query.lower().startswith("http") or any(base in self.query.lower() for base in ["youtube.com/", "youtu.be/", "soundcloud.com/", "vimeo.com/"])
+        is_url = _URL_RE.search(self.query) is not None
         ytq = self.query # The query or URL passed to yt-dlp
         search_type_msg = "URL" if is_url else "ricerca testuale"
 
@@ -110,21 +461,20 @@ class YoutubeSearchWorker(QThread):
             'restrictfilenames': True, # Avoid special characters in filenames
             'default_search': 'ytsearch', # Use YouTube search if not a URL
             'progress_hooks': [self._hook], # Our custom hook
+            'match_filter': self._match, # Checked before each entry: stops playlists/enrichment on cancel
             'usenetrc': False, # Don't use .netrc file
             'cookiefile': None, # Don't use cookies unless specified
             'no_warnings': True, # Suppress yt-dlp warnings
             'ignoreerrors': True, # Try to continue if some items in playlist fail
             'skip_download': not self.download_audio, # Skip download if not requested
-            'writethumbnail': self.download_audio, # Write thumbnail if downloading
-            'writeinfojson': self.download_audio, # Write .info.json if downloading (useful for metadata)
+            'writethumbnail': self.download_audio and self.embed_metadata, # Only needed for EmbedThumbnail (covers come from CoverDownloadWorker)
+            'writeinfojson': self.download_audio, # Write .info.json if downloading (read back by the GUI download cache)
             'outtmpl': str(DOWNLOAD_DIR / '%(extractor)s_%(id)s.%(ext)s'), # Default template (gets overwritten for MP3)
         }
 
         if is_url:
              # If it looks like a playlist, ensure playlist extraction is enabled
-             if any(param in self.query.lower() for param in ["list=", "/playlist?", "/sets/"]) or \
-                "music.youtube.com/playlist" in self.query.lower() or \
-                "soundcloud.com/" in self.query.lower() and "/sets/" in self.query.lower():
+             if _PLAYLIST_RE.search(self.query):
                  opts['noplaylist'] = False
                  opts['extract_flat'] = True # Use flat extraction for playlists speed
                  search_type_msg = "Playlist/URL"
@@ -133,24 +483,32 @@ class YoutubeSearchWorker(QThread):
                  opts['extract_flat'] = False # Get full info directly for single items
 
              # If downloading audio for a single YouTube video, don't use flat extract
-             if self.download_audio and YOUTUBE_REGEX.search(self.query) and not opts['noplaylist']:
+             if self.download_audio and extract_yt_id(self.query) and not opts['noplaylist']:
                   opts['extract_flat'] = False
 
         else: # Text search
              ytq = f"ytsearch{self.num_results}:{self.query}" # Format for yt-dlp search
              opts['noplaylist'] = True # Search results are not playlists
-             opts['extract_flat'] = False # Need full info for search results
+             # Flat search first (IDs/titles only, fast); the full info of each result is then
+             # extracted in parallel by _enrich_entries
+             opts['extract_flat'] = True
              # Cannot download audio directly from text search results (requires URL first)
              if self.download_audio:
-                 print("Warning: Download locale richiesto ma query è ricerca testuale. Verrà solo estratta l'informazione.")
+                 log.warning("Download locale richiesto ma query è ricerca testuale. Verrà solo estratta l'informazione.")
                  self.download_audio = False
                  opts['skip_download'] = True
 
 
+        # --- Streaming only: prefer YouTube player clients that return directly playable URLs ---
+        # (the ios client skips the JS signature/n-parameter deciphering; web stays as fallback)
+        if not self.download_audio:
+             opts['extractor_args'] = {'youtube': {'player_client': ['ios', 'web']}}
+             opts['youtube_include_dash_manifest'] = False
+
         # --- Configure MP3 Download ---
         if self.download_audio:
              opts['skip_download'] = False # Ensure download is enabled
-             if not FFMPEG_PATH:
+             if not ffmpeg_path():
                   # FFmpeg not found, download best audio format but cannot convert
                   self.error_occurred.emit("Errore: FFmpeg non trovato. Impossibile convertire in MP3. Scarico nel formato audio migliore disponibile.")
                   # Keep the default outtmpl (will save as .webm, .m4a, etc.)
@@ -163,9 +521,9 @@ class YoutubeSearchWorker(QThread):
                        'preferredquality': '192', # Adjust quality (e.g., '128', '320')
                        # Ensure final file is mp3, even if temporary was different
                        'nopostoverwrites': False,
-                  },{
-                       'key': 'EmbedThumbnail', # Embed thumbnail if downloaded
                   }]
+                  if self.embed_metadata:
+                       opts['postprocessors'].append({'key': 'EmbedThumbnail'}) # Embed thumbnail (extra FFmpeg remux)
                   opts['format'] = 'bestaudio/best' # Still request best audio source
                   opts['keepvideo'] = False # Don't keep original video/audio file after conversion
 
@@ -173,142 +531,143 @@ class YoutubeSearchWorker(QThread):
         self.progress_update.emit(f"Avvio {search_type_msg} per: \"{self.query[:50]}...\"")
         tracks = []
         try:
-            # Create yt-dlp instance within the try block
-            self._ydl = yt_dlp.YoutubeDL(opts)
-            with self._ydl: # Use context manager for proper cleanup
-                 if self._is_cancelled: return
+            # Info-only lookups may be served from the on-disk metadata cache (downloads never are)
+            cache_key = None if self.download_audio else _meta_cache_key(ytq, opts)
+            info = _read_meta_cache(cache_key) if cache_key else None
+            if info is not None:
+                 self.progress_update.emit("Risultati dalla cache...")
+            else:
+                 # Reuse the process-wide YoutubeDL for these options (extractors already loaded);
+                 # a private instance is created only if another search is still using it
+                 cached_ydl = _acquire_ydl(opts, self._hook, self._match, self._on_download_done)
+                 if cached_ydl:
+                      self._ydl = cached_ydl.ydl
+                 else:
+                      self._ydl = yt_dlp.YoutubeDL(opts)
+                      self._ydl.add_post_processor(_download_done_pp(self._on_download_done), when='after_move')
+                 try:
+                      if self._is_cancelled: return
 
-                 # Use download=True only if we actually intend to download/convert
-                 # Use download=False (simulate) if only getting info
-                 should_download_flag = self.download_audio
+                      # Use download=True only if we actually intend to download/convert
+                      # Use download=False (simulate) if only getting info
+                      should_download_flag = self.download_audio
 
-                 self.progress_update.emit("Estrazione informazioni...")
-                 # extract_info performs download/postprocessing if skip_download is False
-                 info = self._ydl.extract_info(ytq, download=should_download_flag)
+                      self.progress_update.emit("Estrazione informazioni...")
+                      # extract_info performs download/postprocessing if skip_download is False
+                      info = self._ydl.extract_info(ytq, download=should_download_flag)
+                 finally:
+                      if cached_ydl:
+                           cached_ydl.release()
+                      else:
+                           self._ydl.close()
 
-                 if self._is_cancelled:
-                     self.results_ready.emit([])
-                     return
+                 if not is_url and info and info.get('entries') and not self._is_cancelled:
+                      self.progress_update.emit(f"Estrazione dettagli di {len(info['entries'])} risultati...")
+                      info = {'entries': self._enrich_entries(info['entries'], opts)}
 
-                 if info is None:
-                      # Check if cancelled during extraction
-                      if self._is_cancelled: return
-                      self.error_occurred.emit(f"Nessuna informazione estratta per \"{self.query}\". Potrebbe essere un URL non supportato, privato, con restrizioni geografiche, o un errore di rete.")
-                      self.results_ready.emit([])
-                      return
-
-                 # --- Process results ---
-                 entries_to_process = []
-                 if 'entries' in info: # Playlist or search results
-                     entries_to_process = info.get("entries", [])
-                     # Filter out None entries which can occur with ignoreerrors=True
-                     entries_to_process = [e for e in entries_to_process if e is not None]
-                     if not is_url: # Limit results for text search
-                          entries_to_process = entries_to_process[:self.num_results]
-                 elif info: # Single video/item result
-                     entries_to_process = [info]
-
-                 self.progress_update.emit(f"Processando {len(entries_to_process)} risultati...")
-                 time.sleep(0.1) # Brief pause for UI update
-
-                 for i, entry in enumerate(entries_to_process):
-                    if self._is_cancelled: break
-                    if not entry: continue # Skip if entry is None or empty
-
-                    # --- Extract details from the entry dictionary ---
-                    title = entry.get("title", "Titolo Sconosciuto")
-                    # Try different thumbnail keys yt-dlp might use
-                    thumbnail_url = entry.get("thumbnail") or \
-                                    (entry.get("thumbnails")[0].get("url") if entry.get("thumbnails") else None)
-                    duration_sec = entry.get("duration", 0)
-                    webpage_url = entry.get("webpage_url") or entry.get("original_url") # YouTube page etc.
-                    video_id = entry.get("id")
-                    extractor = entry.get("extractor_key", "Generic").lower()
-
-                    # --- Determine URL/Path and is_local status ---
-                    url_to_use = None
-                    is_local_track = False
+                 if cache_key and info is not None and not self._is_cancelled:
+                      _write_meta_cache(cache_key, info)
+
+            if self._is_cancelled:
+                self.results_ready.emit([])
+                return
+
+            if info is None:
+                 # Check if cancelled during extraction
+                 if self._is_cancelled: return
+                 self.error_occurred.emit(f"Nessuna informazione estratta per \"{self.query}\". Potrebbe essere un URL non supportato, privato, con restrizioni geografiche, o un errore di rete.")
+                 self.results_ready.emit([])
+                 return
+
+            # --- Process results ---
+            entries_to_process = []
+            if 'entries' in info: # Playlist or search results
+                entries_to_process = info.get("entries", [])
+                # Filter out None entries which can occur with ignoreerrors=True
+                entries_to_process = [e for e in entries_to_process if e is not None]
+                if not is_url: # Limit results for text search
+                     entries_to_process = entries_to_process[:self.num_results]
+            elif info: # Single video/item result
+                entries_to_process = [info]
+
+            self.progress_update.emit(f"Processando {len(entries_to_process)} risultati...")
+
+            # One directory listing instead of a stat() per entry when looking for downloaded files
+            downloaded_names = set()
+            if self.download_audio:
+                 try:
+                      with os.scandir(DOWNLOAD_DIR) as it:
+                           downloaded_names = {e.name for e in it}
+                 except OSError as e:
+                      log.warning("Impossibile elencare %s: %s", DOWNLOAD_DIR, e)
+
+            def is_downloaded(path):
+                 """True if path exists, using the directory snapshot for files in DOWNLOAD_DIR."""
+                 if path.parent == DOWNLOAD_DIR:
+                      return path.name in downloaded_names
+                 return path.exists()
+
+            for entry in entries_to_process:
+               if self._is_cancelled: break
+               if not entry: continue # Skip if entry is None or empty
+
+               # Already sent with track_ready while yt-dlp was still working on the other entries
+               streamed = self._streamed.get(_entry_key(entry))
+               if streamed is not None:
+                    tracks.append(streamed)
+                    continue
+
+               local_path = None
+               if self.download_audio:
+                    # If download was successful, yt-dlp *should* add 'requested_downloads' or populate 'filepath'
+                    # in the postprocessed entry. Let's check based on expected output.
+
+                    # Construct expected filename based on whether conversion happened
+                    expected_ext = '.mp3' if ffmpeg_path() else '.' + entry.get('ext', 'unknown')
+                    expected_filename = f"{entry.get('extractor','generic').lower()}_{entry.get('id')}{expected_ext}"
+                    expected_path = DOWNLOAD_DIR / expected_filename
                     final_filepath = None # Store the path to the final downloaded/converted file
 
-                    if self.download_audio:
-                         # If download was successful, yt-dlp *should* add 'requested_downloads' or populate 'filepath'
-                         # in the postprocessed entry. Let's check based on expected output.
-
-                         # Construct expected filename based on whether conversion happened
-                         expected_ext = '.mp3' if FFMPEG_PATH else '.' + entry.get('ext', 'unknown')
-                         expected_filename = f"{entry.get('extractor','generic').lower()}_{video_id}{expected_ext}"
-                         expected_path = DOWNLOAD_DIR / expected_filename
-
-                         # Check if the expected file exists
-                         if expected_path.exists():
-                              final_filepath = expected_path
-                         else:
-                              # Fallback: Check if 'filepath' key exists (might point to temp before conversion)
-                              # Or check 'requested_downloads' which contains info about the final file
-                              req_downloads = entry.get('requested_downloads')
-                              if req_downloads and isinstance(req_downloads, list) and req_downloads[0].get('filepath'):
-                                   final_filepath = Path(req_downloads[0]['filepath'])
-                              elif entry.get('filepath'): # Less reliable after postprocessing
-                                   # Check if this path exists and has the right extension
-                                   potential_path = Path(entry['filepath'])
-                                   if potential_path.exists() and potential_path.suffix.lower() == expected_ext:
-                                        final_filepath = potential_path
-
-
-                         if final_filepath and final_filepath.exists():
-                              url_to_use = str(final_filepath.resolve())
-                              is_local_track = True
-                              # Try to get duration from downloaded file's metadata if missing
-                              if not duration_sec or duration_sec <= 0:
-                                   duration_sec = entry.get('duration', 0) # Use original duration if possible
-                              print(f"Download successful: {final_filepath.name}")
-                         else:
-                              # Download seems to have failed or file path is incorrect
-                              print(f"Warning: Download/Conversion failed or final filepath missing for entry: {title}. Expected: {expected_path}. Falling back to stream URL if available.")
-                              url_to_use = entry.get("url") # Stream URL (best available audio format)
-                              is_local_track = False
-                              if not url_to_use and webpage_url:
-                                  print(f"Warning: Stream URL also missing for {title}, using webpage_url as last resort.")
-                                  url_to_use = webpage_url # Last resort
+                    # Check if the expected file exists
+                    if expected_filename in downloaded_names:
+                         final_filepath = expected_path
                     else:
-                         # Not downloading, just get the stream URL
-                         url_to_use = entry.get("url") # Stream URL (best available audio format)
-                         is_local_track = False
-                         if not url_to_use and webpage_url:
-                             print(f"Warning: Stream URL missing for {title}, using webpage_url as last resort.")
-                             url_to_use = webpage_url # Last resort
-
-                    # Ensure webpage_url is sensible (especially for YouTube)
-                    if not webpage_url and video_id and extractor in ['youtube', 'youtubetab']:
-                         webpage_url = f"https://www.youtube.com/watch?v={video_id}"
-
-                    # Create Track object
-                    track = Track(
-                        url=url_to_use,
-                        title=title,
-                        thumbnail_url=thumbnail_url,
-                        duration_sec=duration_sec or 0, # Ensure it's not None
-                        is_local=is_local_track,
-                        webpage_url=webpage_url
-                    )
-
-                    # Add track only if it has a valid URL or path
-                    if track.url:
-                         tracks.append(track)
+                         # Fallback: Check if 'filepath' key exists (might point to temp before conversion)
+                         # Or check 'requested_downloads' which contains info about the final file
+                         req_downloads = entry.get('requested_downloads')
+                         if req_downloads and isinstance(req_downloads, list) and req_downloads[0].get('filepath'):
+                              final_filepath = Path(req_downloads[0]['filepath'])
+                         elif entry.get('filepath'): # Less reliable after postprocessing
+                              # Check if this path exists and has the right extension
+                              potential_path = Path(entry['filepath'])
+                              if potential_path.suffix.lower() == expected_ext and is_downloaded(potential_path):
+                                   final_filepath = potential_path
+
+                    if final_filepath and is_downloaded(final_filepath):
+                         local_path = final_filepath
                     else:
-                         print(f"Avviso: Impossibile ottenere URL/path valido per '{track.title}'. Brano saltato.")
+                         # Download seems to have failed or file path is incorrect
+                         log.warning("Download/Conversion failed or final filepath missing for entry: %s. Expected: %s. Falling back to stream URL if available.", entry.get("title"), expected_path)
+
+               track = self._entry_to_track(entry, local_path)
+               # Add track only if it has a valid URL or path
+               if track.url:
+                    tracks.append(track)
+                    self.track_ready.emit(track)
+               else:
+                    log.warning("Impossibile ottenere URL/path valido per '%s'. Brano saltato.", track.title)
 
 
         except yt_dlp.utils.DownloadCancelled:
-             print("YoutubeDL process explicitly cancelled by user.")
+             log.info("YoutubeDL process explicitly cancelled by user.")
              self.results_ready.emit([]) # Emit empty list on cancellation
              return # Exit run method
         except yt_dlp.utils.ExtractorError as e:
-             print(f"yt-dlp Extractor Error: {e}")
+             log.warning("yt-dlp Extractor Error: %s", e)
              self.error_occurred.emit(f"Errore estrattore yt-dlp: {e}. L'URL potrebbe essere errato, privato o non supportato.")
         except yt_dlp.utils.DownloadError as e:
              # This catches errors during download or postprocessing (like ffmpeg errors)
-             print(f"yt-dlp Download/Conversion Error: {e}")
+             log.warning("yt-dlp Download/Conversion Error: %s", e)
              # Try to provide a more specific error message
              error_msg = f"Errore download/conversione (yt-dlp): {e}. "
              if "ffmpeg" in str(e).lower():
@@ -318,13 +677,12 @@ class YoutubeSearchWorker(QThread):
              self.error_occurred.emit(error_msg)
         except Exception as exc:
             # Catch any other unexpected error during the process
-            import traceback
-            print(f"Errore generico in YoutubeSearchWorker: {exc}\n{traceback.format_exc()}")
+            log.exception("Errore generico in YoutubeSearchWorker: %s", exc)
             self.error_occurred.emit(f"Errore generico durante la ricerca/download: {exc}")
         finally:
             # Final check for cancellation before emitting results
             if self._is_cancelled:
-                 print("Process finished after cancellation request.")
+                 log.debug("Process finished after cancellation request.")
                  self.results_ready.emit([])
             else:
                  self.results_ready.emit(tracks) # Emit the collected tracks
@@ -351,24 +709,27 @@ class CoverDownloadWorker(QThread):
     def run(self):
         """Downloads the image from URL and saves it."""
         if self._is_cancelled or not self.url or not str(self.url).startswith("http"):
-            # print(f"Cover download cancelled or invalid URL: {self.url}") # Debug
+            log.debug("Cover download cancelled or invalid URL: %s", self.url)
             self.cover_error.emit()
             return
 
+        # Already cached (e.g. saved by an earlier worker for the same thumbnail): skip the HTTP request
+        try:
+            if self.save_path.stat().st_size > 128:
+                self.cover_ready.emit(str(self.save_path))
+                return
+        except OSError: # Not cached yet
+            pass
+
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8', # Accept various image types
-                'Accept-Language': 'en-US,en;q=0.9',
-            }
-            # Use stream=True to avoid loading large images into memory at once
-            response = requests.get(self.url, timeout=20, headers=headers, allow_redirects=True, stream=True)
+            # Use stream=True to avoid loading large images into memory at once (headers come from the session)
+            response = _COVER_SESSION.get(self.url, timeout=20, allow_redirects=True, stream=True)
             response.raise_for_status() # Check for HTTP errors (4xx, 5xx)
 
             # Check content type if possible
             content_type = response.headers.get('Content-Type', '').lower()
             if not content_type.startswith('image/'):
-                 print(f"Warning: URL {self.url} did not return an image content type ({content_type}). Aborting download.")
+                 log.warning("URL %s did not return an image content type (%s). Aborting download.", self.url, content_type)
                  response.close()
                  self.cover_error.emit()
                  return
@@ -376,30 +737,45 @@ class CoverDownloadWorker(QThread):
             # Ensure target directory exists
             self.save_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # Download and save chunk by chunk
+            # Download in 64 KiB chunks and write them in batches, with one os.write per batch
+            # instead of one buffered write per 8 KiB chunk
+            cancelled_during_transfer = False
             try:
-                with open(self.save_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
+                fd = os.open(self.save_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+                try:
+                    pending = []
+                    pending_size = 0
+                    for chunk in response.iter_content(chunk_size=65536):
                         if self._is_cancelled:
-                             print(f"Cover download cancelled during transfer: {self.url}")
-                             response.close()
-                             # Clean up partially downloaded file
-                             if self.save_path.exists():
-                                 try: self.save_path.unlink()
-                                 except OSError: pass
-                             self.cover_error.emit()
-                             return
-                        f.write(chunk)
+                             cancelled_during_transfer = True
+                             break
+                        pending.append(chunk)
+                        pending_size += len(chunk)
+                        if pending_size >= _COVER_WRITE_BATCH:
+                             _write_all(fd, b"".join(pending))
+                             pending.clear()
+                             pending_size = 0
+                    if pending and not cancelled_during_transfer:
+                         _write_all(fd, b"".join(pending))
+                finally:
+                    os.close(fd)
+                if cancelled_during_transfer:
+                     log.debug("Cover download cancelled during transfer: %s", self.url)
+                     # Clean up partially downloaded file
+                     try: self.save_path.unlink()
+                     except OSError: pass
+                     self.cover_error.emit()
+                     return
             except IOError as e:
-                 print(f"Error saving cover to {self.save_path}: {e}")
+                 log.error("Error saving cover to %s: %s", self.save_path, e)
                  self.cover_error.emit()
                  return # Exit if saving fails
             finally:
-                 response.close() # Ensure connection is closed
+                 response.close() # Return the connection to the session pool (or close it if unread)
 
             # Check if cancelled immediately after loop
             if self._is_cancelled:
-                 print(f"Cover download cancelled shortly after finishing transfer: {self.url}")
+                 log.debug("Cover download cancelled shortly after finishing transfer: %s", self.url)
                  # Clean up the completed file if cancelled
                  if self.save_path.exists():
                      try: self.save_path.unlink()
@@ -407,123 +783,151 @@ class CoverDownloadWorker(QThread):
                  self.cover_error.emit()
                  return
 
+            # Store it at display size (also makes the cache files much smaller)
+            _shrink_cover(self.save_path)
+
             # Success: emit the path
-            # print(f"Cover downloaded successfully: {self.save_path}") # Debug
+            log.debug("Cover downloaded successfully: %s", self.save_path)
             self.cover_ready.emit(str(self.save_path))
 
         except requests.exceptions.Timeout:
-             print(f"Timeout scaricando copertina: {self.url}")
+             log.warning("Timeout scaricando copertina: %s", self.url)
              self.cover_error.emit()
         except requests.exceptions.RequestException as e:
             # Covers network errors, SSL errors, invalid URLs etc.
-            print(f"Errore network scaricando copertina {self.url}: {e}")
+            log.warning("Errore network scaricando copertina %s: %s", self.url, e)
             self.cover_error.emit()
         except Exception as e:
             # Catch any other unexpected error
-            import traceback
-            print(f"Errore generico durante download copertina {self.url}: {e}\n{traceback.format_exc()}")
+            log.exception("Errore generico durante download copertina %s: %s", self.url, e)
             self.cover_error.emit()
 
 
-class FileProbeWorker(QThread):
-    """Worker thread to get the duration of a local media file using VLC."""
-    probe_done = pyqtSignal(str, int) # Emits (path, duration_ms)
+class _CoverDecodeSignals(QObject):
+    """Signals of CoverDecodeTask (QRunnable is not a QObject)."""
+    decoded = pyqtSignal(str, QImage) # Path, decoded image (null QImage on failure)
 
+
+class CoverDecodeTask(QRunnable):
+    """Decodes a cached cover file into a QImage on the global QThreadPool.
+
+    QImage (unlike QPixmap) can be created outside the GUI thread; the receiver converts it.
+    """
     def __init__(self, path):
         super().__init__()
-        self.path = str(path) # Ensure path is a string
+        self.path = str(path)
+        self.signals = _CoverDecodeSignals()
+
+    def run(self):
+        reader = QImageReader(self.path)
+        reader.setAutoTransform(True) # Apply EXIF orientation like QPixmap(path) does
+        image = reader.read()
+        if image.isNull():
+            log.debug("Impossibile decodificare la copertina %s: %s", self.path, reader.errorString())
+        self.signals.decoded.emit(self.path, image)
+
+
+class _FileProbeSignals(QObject):
+    """Signals of FileProbeTask (QRunnable is not a QObject)."""
+    probe_done = pyqtSignal(object, dict) # Emits (task, {path: duration_ms}) for the whole batch
+
+
+class FileProbeTask(QRunnable):
+    """Gets the duration of a batch of local media files (mutagen, falling back to VLC).
+
+    Runs on the global QThreadPool: no dedicated QThread (and thread stack) per import.
+    """
+    def __init__(self, paths):
+        super().__init__()
+        self.signals = _FileProbeSignals()
+        self.paths = [str(p) for p in paths] # Ensure paths are strings
         self._is_cancelled = False
-        self._local_vlc_instance = None
-        self._media = None
+        self._parsed_event = threading.Event() # Set by VLC when parsing ends (or by cancel())
 
     def cancel(self):
-         """Signals the worker to stop."""
+         """Signals the worker to stop (called from the GUI thread).
+
+         Only sets flags: the VLC Media belongs to the pool thread, which releases it in _probe_vlc.
+         """
          self._is_cancelled = True
-         # Release VLC resources if held
-         if self._media:
-             try: self._media.release()
-             except Exception: pass
-             self._media = None
-         if self._local_vlc_instance:
-             try: self._local_vlc_instance.release()
-             except Exception: pass
-             self._local_vlc_instance = None
+         self._parsed_event.set() # Wake run() immediately
 
     def run(self):
-        """Probes the file for its duration."""
-        duration_ms = 0
+        """Probes every file of the batch for its duration."""
+        durations = {}
+        try:
+            for path in self.paths:
+                if self._is_cancelled: return
+                # Header read first (no plugin loading), VLC only for formats mutagen can't handle
+                durations[path] = self._probe_mutagen(path) or self._probe_vlc(path)
+        finally:
+            # Emit signal only if not cancelled
+            if not self._is_cancelled:
+                 self.signals.probe_done.emit(self, durations)
+
+    def _probe_mutagen(self, path):
+        """Reads the duration from the file headers with mutagen. Returns 0 if not possible."""
+        if mutagen is None:
+            return 0
         try:
-            if self._is_cancelled: return
+            audio = mutagen.File(path)
+            length = audio.info.length if audio is not None else 0
+            return int(length * 1000) if length and length > 0 else 0
+        except Exception as e:
+            log.debug("mutagen non riesce a leggere %s: %s", path, e)
+            return 0
 
-            # Create a short-lived VLC instance for probing
-            # Avoids potential conflicts with the main player instance
-            self._local_vlc_instance = vlc.Instance(['--quiet', '--no-xlib' if sys.platform.startswith('linux') else ''])
-            if not self._local_vlc_instance:
+    def _probe_vlc(self, path):
+        """Probes a single file with VLC (slower fallback). Returns the duration in ms, 0 on failure."""
+        duration_ms = 0
+        media = None
+        try:
+            # Shared probing instance (never released here, only the per-file Media is)
+            probe_vlc = _get_probe_vlc()
+            if not probe_vlc:
                  raise RuntimeError("Impossibile creare istanza VLC locale per probe.")
 
-            if self._is_cancelled: return
+            self._parsed_event.clear()
+            if self._is_cancelled: return 0
 
             # Create media object from the file path
-            self._media = self._local_vlc_instance.media_new_path(self.path)
-            if not self._media:
-                 raise RuntimeError(f"Impossibile creare media per il probe: {self.path}")
-
-            # Asynchronously parse the media to get metadata like duration
+            media = probe_vlc.media_new_path(path)
+            if not media:
+                 raise RuntimeError(f"Impossibile creare media per il probe: {path}")
+
+            # Asynchronously parse the media to get metadata like duration.
+            # VLC signals completion with MediaParsedChanged: block on an Event instead of polling the state.
+            parsed_event = self._parsed_event
+            media.event_manager().event_attach(vlc.EventType.MediaParsedChanged,
+                                               lambda event: parsed_event.set())
             # Use flags to parse locally only, don't fetch network resources
             parse_flags = vlc.MediaParseFlag.parse_local | vlc.MediaParseFlag.do_not_fetch_network
-            self._media.parse_with_options(parse_flags, 10000) # Timeout 10 seconds for parsing
-
-            # Wait for parsing to complete or timeout/error
-            parsed = False
-            # Check more frequently for shorter period
-            for _ in range(500): # Max ~5 seconds wait (500 * 0.01s)
-                if self._is_cancelled: break
-                state = self._media.get_state()
-                # Parsing is done when state is Parsed or beyond (Playing, Paused etc.)
-                if state >= vlc.State.Parsed:
-                    parsed = True
-                    break
-                # Stop waiting if an error occurs or media stops unexpectedly
-                if state in (vlc.State.Error, vlc.State.NothingSpecial, vlc.State.Ended, vlc.State.Stopped):
-                     print(f"Warning: Media state became {state} during parse for {self.path}")
-                     break
-                time.sleep(0.01) # Small sleep to avoid busy-waiting
-
-            if self._is_cancelled: return
+            media.parse_with_options(parse_flags, 10000) # Timeout 10 seconds for parsing
+
+            # Wait for parsing to complete (VLC also reports timeout/failure through the same event)
+            if not parsed_event.wait(10.5):
+                 log.warning("No parse notification from VLC for %s", path)
+            parsed = not self._is_cancelled and media.get_parsed_status() == vlc.MediaParsedStatus.done
+
+            if self._is_cancelled: return 0
 
             # If parsing completed successfully, get the duration
             if parsed:
-                duration_ms = self._media.get_duration()
+                duration_ms = media.get_duration()
                 if duration_ms is None or duration_ms <= 0:
-                    # print(f"Warning: Parsed but got invalid duration ({duration_ms}) for {self.path}") # Debug
                     duration_ms = 0
-                # else: # Debug
-                    # print(f"Probe successful for {self.path}: {duration_ms} ms")
             else:
-                print(f"Warning: Failed to parse media within timeout for {self.path}. State: {self._media.get_state()}")
+                log.warning("Failed to parse media within timeout for %s. Status: %s", path, media.get_parsed_status())
                 duration_ms = 0 # Indicate failure to get duration
 
         except Exception as e:
-            print(f"Errore durante il probe del file {self.path}: {e}")
+            log.warning("Errore durante il probe del file %s: %s", path, e)
             duration_ms = 0 # Indicate failure
         finally:
-            # --- Release VLC resources ---
-            # Use temporary variables to avoid race conditions with cancel()
-            media_to_release = self._media
-            instance_to_release = self._local_vlc_instance
-            self._media = None
-            self._local_vlc_instance = None
-
-            if media_to_release:
-                try: media_to_release.release()
-                except Exception as e_rel: print(f"Error releasing media for {self.path}: {e_rel}")
-            if instance_to_release:
-                 try: instance_to_release.release()
-                 except Exception as e_rel: print(f"Error releasing local VLC instance for {self.path}: {e_rel}")
-            # --- End Release VLC resources ---
-
-            # Emit signal only if not cancelled
-            if not self._is_cancelled:
-                 self.probe_done.emit(self.path, duration_ms)
+            # Released only here, by the thread that created it (cancel() never touches it)
+            if media:
+                try: media.release()
+                except Exception as e_rel: log.warning("Error releasing media for %s: %s", path, e_rel)
+        return duration_ms
 
-print("jukebox_workers.py loaded.")
\ No newline at end of file
+log.debug("jukebox_workers.py loaded.")
\ No newline at end of file